@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""Synthetic Bitwarden / Chrome export generator for benchmarks.
+
+Produces a Bitwarden JSON export and a Chrome passwords CSV with tunable
+duplicate rate, URI fan‑out, shared‑credential group size and non‑login item
+mix. Output is written item by item and only a bounded sample of logins is
+kept for generating duplicates, so 1M‑item vaults can be generated in
+constant memory, and the same seed always yields the same files.
+
+Example usage::
+
+    python -m bench.generate --items 100000 --out-dir /tmp/vault-100k
+
+With ``--password`` a password‑protected copy of the export
+(``vault.encrypted.json``, built in memory) is written as well, for testing
+encrypted exports offline.
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import random
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+
+TLDS = [".com", ".org", ".net", ".de", ".co.uk", ".io"]
+PATHS = ["", "/", "/login", "/signin", "/account/login", "/auth?next=%2Fhome", "/#/login"]
+NON_LOGIN_TYPES = [2, 3, 4]  # secure note, card, identity
+# logins kept for duplicates and CSV overlap; beyond this a uniform sample is kept
+LOGIN_SAMPLE_SIZE = 10_000
+
+
+@dataclass
+class GeneratorConfig:
+    items: int = 1000
+    duplicate_rate: float = 0.2  # share of logins that duplicate an earlier login
+    uri_fanout: int = 3  # max URIs per login
+    group_size: int = 4  # logins sharing one username/password on average
+    non_login_rate: float = 0.1  # share of non‑login items
+    csv_items: int | None = None  # Chrome CSV rows (default: items // 4)
+    csv_overlap: float = 0.5  # share of CSV rows that already exist in the vault
+    seed: int = 0
+
+
+class _Vault:
+    """Deterministic source of synthetic logins."""
+
+    def __init__(self, config: GeneratorConfig):
+        self.config = config
+        self.rng = random.Random(config.seed)
+        self.logins: list[tuple[str, str, str]] = []  # sample of (domain, username, password)
+        self.login_count = 0
+        self.credential_count = 0
+
+    def _uuid(self) -> str:
+        return str(uuid.UUID(int=self.rng.getrandbits(128), version=4))
+
+    def _timestamp(self) -> str:
+        day = self.rng.randrange(1, 28)
+        month = self.rng.randrange(1, 13)
+        ms = self.rng.randrange(0, 1000)
+        return f"20{self.rng.randrange(18, 26)}-{month:02d}-{day:02d}T{self.rng.randrange(24):02d}:00:00.{ms:03d}Z"
+
+    def _uri(self, domain: str) -> str:
+        prefix = self.rng.choice(["https://", "https://www.", "http://", ""])
+        return prefix + domain + self.rng.choice(PATHS)
+
+    def _credentials(self) -> tuple[str, str]:
+        # a new credential every `group_size` logins on average
+        if not self.credential_count or self.rng.random() < 1 / max(self.config.group_size, 1):
+            self.credential_count += 1
+        idx = self.rng.randrange(max(self.credential_count - 3, 0), self.credential_count)
+        return f"user{idx}@example.com", f"pw-{idx:08x}"
+
+    def login(self) -> tuple[str, str, str]:
+        if self.logins and self.rng.random() < self.config.duplicate_rate:
+            return self.rng.choice(self.logins)
+        domain = f"site{self.login_count}{self.rng.choice(TLDS)}"
+        username, password = self._credentials()
+        login = (domain, username, password)
+        self._remember(login)
+        return login
+
+    def _remember(self, login: tuple[str, str, str]) -> None:
+        # reservoir sampling: the sample stays uniform over all logins so far
+        self.login_count += 1
+        if len(self.logins) < LOGIN_SAMPLE_SIZE:
+            self.logins.append(login)
+            return
+        slot = self.rng.randrange(self.login_count)
+        if slot < LOGIN_SAMPLE_SIZE:
+            self.logins[slot] = login
+
+    def login_item(self) -> dict:
+        domain, username, password = self.login()
+        uris = [{"match": None, "uri": self._uri(domain)}]
+        for _ in range(self.rng.randrange(0, self.config.uri_fanout)):
+            uris.append({"match": None, "uri": self._uri(f"{self.rng.choice(['app', 'login', 'm'])}.{domain}")})
+        return {
+            "passwordHistory": None,
+            "revisionDate": self._timestamp(),
+            "creationDate": self._timestamp(),
+            "deletedDate": None,
+            "id": self._uuid(),
+            "organizationId": None,
+            "folderId": None,
+            "type": 1,
+            "reprompt": 0,
+            "name": domain,
+            "notes": None,
+            "favorite": self.rng.random() < 0.05,
+            "login": {
+                "fido2Credentials": [],
+                "uris": uris,
+                "username": username,
+                "password": password,
+                "totp": None,
+            },
+            "collectionIds": None,
+        }
+
+    def other_item(self) -> dict:
+        return {
+            "passwordHistory": None,
+            "revisionDate": self._timestamp(),
+            "creationDate": self._timestamp(),
+            "deletedDate": None,
+            "id": self._uuid(),
+            "organizationId": None,
+            "folderId": None,
+            "type": self.rng.choice(NON_LOGIN_TYPES),
+            "reprompt": 0,
+            "name": f"Item {self.rng.randrange(1 << 20)}",
+            "notes": "Lorem ipsum dolor sit amet\nconsectetur adipiscing elit",
+            "favorite": False,
+            "secureNote": {"type": 0},
+            "collectionIds": None,
+        }
+
+
+def generate(config: GeneratorConfig, out_dir: Path) -> tuple[Path, Path]:
+    """Write ``vault.json`` and ``chrome.csv`` into *out_dir*."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    vault = _Vault(config)
+    json_path = out_dir / "vault.json"
+    csv_path = out_dir / "chrome.csv"
+
+    with json_path.open("w", encoding="utf-8") as fh:
+        fh.write('{\n  "encrypted": false,\n  "folders": [\n    {\n      "id": "%s",\n      "name": "Work"\n    }\n  ],\n  "items": [' % vault._uuid())
+        for idx in range(config.items):
+            item = vault.other_item() if vault.rng.random() < config.non_login_rate else vault.login_item()
+            body = json.dumps(item, indent=2, ensure_ascii=False).replace("\n", "\n    ")
+            fh.write(f"{',' if idx else ''}\n    {body}")
+        fh.write("\n  ]\n}")
+
+    csv_items = config.items // 4 if config.csv_items is None else config.csv_items
+    with csv_path.open("w", newline="", encoding="utf-8") as fh:
+        writer = csv.writer(fh)
+        writer.writerow(["name", "url", "username", "password", "note"])
+        for _ in range(csv_items):
+            if vault.logins and vault.rng.random() < config.csv_overlap:
+                domain, username, password = vault.rng.choice(vault.logins)
+            else:
+                domain, username, password = vault.login()
+            writer.writerow([domain, vault._uri(domain), username, password, ""])
+
+    return json_path, csv_path
+
+
+def encrypt_export(json_path: Path, password: str, iterations: int) -> Path:
+    """Write a password‑protected copy of the export at *json_path* next to it."""
+    from utils.export_crypto import ExportEncryption
+
+    encrypted_path = json_path.with_suffix(".encrypted.json")
+    envelope = ExportEncryption.create(password, iterations).seal(json_path.read_bytes())
+    encrypted_path.write_text(json.dumps(envelope, indent=2), encoding="utf-8")
+    return encrypted_path
+
+
+def main(argv: list[str] | None = None) -> None:
+    defaults = GeneratorConfig()
+    parser = argparse.ArgumentParser(description="Generate a synthetic Bitwarden export and Chrome CSV.")
+    parser.add_argument("--items", type=int, default=defaults.items, help="Number of vault items")
+    parser.add_argument("--duplicate-rate", type=float, default=defaults.duplicate_rate)
+    parser.add_argument("--uri-fanout", type=int, default=defaults.uri_fanout, help="Max URIs per login")
+    parser.add_argument("--group-size", type=int, default=defaults.group_size, help="Avg. logins per shared credential")
+    parser.add_argument("--non-login-rate", type=float, default=defaults.non_login_rate)
+    parser.add_argument("--csv-items", type=int, help="Chrome CSV rows (default: items / 4)")
+    parser.add_argument("--csv-overlap", type=float, default=defaults.csv_overlap)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--out-dir", type=Path, required=True)
+    parser.add_argument("--password", help="Also write a password-protected copy of the export")
+    parser.add_argument("--kdf-iterations", type=int, default=600_000, help="PBKDF2 iterations of the encrypted copy")
+    args = parser.parse_args(argv)
+
+    config = GeneratorConfig(
+        items=args.items,
+        duplicate_rate=args.duplicate_rate,
+        uri_fanout=args.uri_fanout,
+        group_size=args.group_size,
+        non_login_rate=args.non_login_rate,
+        csv_items=args.csv_items,
+        csv_overlap=args.csv_overlap,
+        seed=args.seed,
+    )
+    json_path, csv_path = generate(config, args.out_dir)
+    print(f"Wrote {json_path} and {csv_path}")
+    if args.password:
+        print(f"Wrote {encrypt_export(json_path, args.password, args.kdf_iterations)}")
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
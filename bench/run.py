@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""Benchmark runner for the full cleanup pipeline.
+
+For every vault size a synthetic export is generated (see `bench.generate`)
+and the pipeline stages – load, dedup, Chrome CSV merge, common‑credential
+handling (policy‑driven on a cold cache, then replay on a warm one) and
+save – are run in a fresh subprocess. Wall time, peak RSS and throughput are
+recorded per stage and can be compared against a stored baseline.
+
+Example usage::
+
+    # record a baseline
+    python -m bench.run --sizes 1000 10000 100000 --out baseline.json
+
+    # later: fail (exit code 1) if a stage got more than 25 % slower
+    python -m bench.run --sizes 1000 10000 100000 --baseline baseline.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from bench.generate import GeneratorConfig, generate
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+# policy used to decide every shared-credential group without prompting
+BENCH_POLICY = {"rules": [{"name": "bench", "prefer": ["favorite", "newest"]}]}
+# wall-time differences below this are treated as noise when comparing
+NOISE_FLOOR_S = 0.05
+
+
+def _reset_peak_rss() -> None:
+    """Reset the kernel's peak RSS counter (Linux only, best effort)."""
+    try:
+        Path("/proc/self/clear_refs").write_text("5")
+    except OSError:
+        pass
+
+
+def _peak_rss_kb() -> int:
+    try:
+        with open("/proc/self/status") as fh:
+            for line in fh:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    # ru_maxrss never resets, so this is the process-wide peak
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+@contextmanager
+def _stage(results: dict, name: str):
+    """Time one stage; the body stores the number of items it processed in ``stats["items"]``."""
+    stats = {"items": 0}
+    _reset_peak_rss()
+    start = time.perf_counter()
+    yield stats
+    wall = time.perf_counter() - start
+    results[name] = {
+        "wall_s": round(wall, 4),
+        "peak_rss_kb": _peak_rss_kb(),
+        "items": stats["items"],
+        "items_per_s": round(stats["items"] / wall) if wall else 0,
+    }
+
+
+def run_worker(data_dir: Path, work_dir: Path) -> dict:
+    """Run all stages once; must be called in a fresh process."""
+    # the merge cache lives in the working directory
+    os.chdir(work_dir)
+    logging.disable(logging.INFO)
+
+    from tools.common_credentials import handle_common_credentials
+    from tools.deduplication import deduplicate_items
+    from tools.policy import Policy
+    from wrapper.bitwarden import BitwardenWrapper
+    from wrapper.chrome import iter_csv_items
+
+    policy = Policy.from_dict(BENCH_POLICY)
+    results: dict[str, dict] = {}
+    bitwarden = BitwardenWrapper()
+
+    with _stage(results, "load") as stats:
+        entries = bitwarden.load(data_dir / "vault.json")
+        stats["items"] = len(entries) + len(bitwarden.other_items)
+    with _stage(results, "dedup") as stats:
+        stats["items"] = len(entries)
+        entries = deduplicate_items(entries)
+    with _stage(results, "chrome_merge") as stats:
+        chrome_items = list(iter_csv_items(data_dir / "chrome.csv"))
+        stats["items"] = len(entries) + len(chrome_items)
+        entries = deduplicate_items(entries + chrome_items)
+    with _stage(results, "common_credentials") as stats:
+        stats["items"] = len(entries)
+        entries = handle_common_credentials(entries, policy=policy, interactive=False)
+    with _stage(results, "save") as stats:
+        stats["items"] = len(entries)
+        bitwarden.save(work_dir / "cleaned.json", entries)
+    results["save"]["bytes"] = (work_dir / "cleaned.json").stat().st_size
+
+    # second pass over the same input: every group is answered by the cache
+    entries = deduplicate_items(bitwarden.load(data_dir / "vault.json"))
+    entries = deduplicate_items(entries + list(iter_csv_items(data_dir / "chrome.csv")))
+    with _stage(results, "cache_replay") as stats:
+        stats["items"] = len(entries)
+        handle_common_credentials(entries, decide=False)
+
+    return results
+
+
+def run_size(config: GeneratorConfig, data_root: Path) -> dict:
+    data_dir = data_root / f"vault-{config.items}-seed{config.seed}"
+    if not (data_dir / "vault.json").exists():
+        generate(config, data_dir)
+    with tempfile.TemporaryDirectory(prefix="bw-bench-") as work_dir:
+        proc = subprocess.run(
+            [sys.executable, "-m", "bench.run", "--worker", str(data_dir), work_dir],
+            cwd=REPO_ROOT,
+            check=True,
+            capture_output=True,
+            text=True,
+        )
+    return json.loads(proc.stdout.splitlines()[-1])
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Return a description of every stage slower than *baseline* by more than *tolerance*."""
+    regressions = []
+    for size, stages in results.items():
+        for stage, metrics in stages.items():
+            base = baseline.get(size, {}).get(stage)
+            if not base:
+                continue
+            wall, base_wall = metrics["wall_s"], base["wall_s"]
+            if wall > base_wall * (1 + tolerance) and wall - base_wall > NOISE_FLOOR_S:
+                regressions.append(f"{size} items / {stage}: {base_wall:.3f}s -> {wall:.3f}s")
+            rss, base_rss = metrics["peak_rss_kb"], base["peak_rss_kb"]
+            if rss > base_rss * (1 + tolerance):
+                regressions.append(f"{size} items / {stage}: peak RSS {base_rss} -> {rss} KiB")
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> None:
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv[:1] == ["--worker"]:
+        print(json.dumps(run_worker(Path(argv[1]), Path(argv[2]))))
+        return
+
+    defaults = GeneratorConfig()
+    parser = argparse.ArgumentParser(description="Benchmark the Bitwarden cleanup pipeline.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000], help="Vault sizes to benchmark")
+    parser.add_argument("--duplicate-rate", type=float, default=defaults.duplicate_rate)
+    parser.add_argument("--uri-fanout", type=int, default=defaults.uri_fanout)
+    parser.add_argument("--group-size", type=int, default=defaults.group_size)
+    parser.add_argument("--non-login-rate", type=float, default=defaults.non_login_rate)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--data-dir", type=Path, default=Path(tempfile.gettempdir()) / "bw-bench-data", help="Where generated vaults are kept between runs")
+    parser.add_argument("--out", type=Path, help="Write results as JSON (usable as a baseline)")
+    parser.add_argument("--baseline", type=Path, help="Compare against a previous --out file")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown before a stage counts as regressed")
+    args = parser.parse_args(argv)
+
+    results: dict[str, dict] = {}
+    for size in args.sizes:
+        config = GeneratorConfig(
+            items=size,
+            duplicate_rate=args.duplicate_rate,
+            uri_fanout=args.uri_fanout,
+            group_size=args.group_size,
+            non_login_rate=args.non_login_rate,
+            seed=args.seed,
+        )
+        results[str(size)] = stages = run_size(config, args.data_dir)
+        for stage, metrics in stages.items():
+            print(
+                f"{size:>9} {stage:<20} {metrics['wall_s']:>9.3f}s {metrics['peak_rss_kb'] / 1024:>9.1f} MiB "
+                f"{metrics['items_per_s']:>12} items/s"
+            )
+
+    if args.out:
+        args.out.write_text(json.dumps(results, indent=2))
+    if args.baseline:
+        regressions = compare(results, json.loads(args.baseline.read_text()), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
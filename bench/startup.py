@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""Startup budget check based on ``python -X importtime``.
+
+Imports ``main`` in fresh interpreters, takes the fastest cumulative import
+time of several runs and fails (exit code 1) when it exceeds the budget or
+when a module that only specific modes need is imported eagerly.
+
+Example usage::
+
+    python -m bench.startup --budget-ms 100
+"""
+from __future__ import annotations
+
+import argparse
+import subprocess
+import sys
+
+from bench.run import REPO_ROOT
+
+# modules only interactive sessions or optional modes may load
+LAZY_MODULES = ["rich", "sqlite3", "cryptography", "concurrent.futures.process", "cProfile"]
+DEFAULT_BUDGET_MS = 100
+
+
+def measure_imports(module: str = "main") -> dict[str, tuple[int, int]]:
+    """Import nesting depth and cumulative import time (µs) of every module loaded by importing *module*.
+
+    Runs in a fresh interpreter; *module* itself has depth 0.
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_ROOT, stdin=subprocess.DEVNULL, capture_output=True, text=True, check=True,
+    )
+    times: dict[str, tuple[int, int]] = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        times[name.strip()] = (depth, int(cumulative))
+    return times
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Check the tool's import time against a budget.")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS, help="Allowed import time of main")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters to measure (the fastest counts)")
+    parser.add_argument("--top", type=int, default=10, help="Slowest top-level imports to list")
+    args = parser.parse_args(argv)
+
+    runs = [measure_imports() for _ in range(args.runs)]
+    best = min(runs, key=lambda times: times["main"][1])
+    total_ms = best["main"][1] / 1000
+    print(f"import main: {total_ms:.1f} ms (budget {args.budget_ms:.0f} ms, best of {args.runs})")
+    direct = sorted(((us, name) for name, (depth, us) in best.items() if depth == 1), reverse=True)
+    for us, name in direct[:args.top]:
+        print(f"  {us / 1000:>7.1f} ms  {name}")
+
+    eager = sorted(name for name in best if name in LAZY_MODULES or name.split(".")[0] in LAZY_MODULES)
+    if eager:
+        print(f"eagerly imported: {', '.join(eager)}")
+    if total_ms > args.budget_ms or eager:
+        sys.exit(1)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
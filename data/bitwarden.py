@@ -1,16 +1,63 @@
 import hashlib
 import json
+import logging
+import os
 import uuid
 from datetime import datetime
-from typing import Optional
+from typing import TYPE_CHECKING, Iterable, Optional
 
 from dataclasses import dataclass, field
 
 from utils.logger import logger
-from utils.url import shorten_uri, normalise_domain
+from utils.metrics import metrics
+from utils.url import shorten_uri
 
+if TYPE_CHECKING:
+    from data.columnar import LoginStore
 
-@dataclass
+FINGERPRINT_VERSION = 2
+_FINGERPRINT_PREFIX = f"v{FINGERPRINT_VERSION}:"
+FINGERPRINT_KEY_SIZE = 32
+# random per process until `set_fingerprint_key` installs the persistent key
+# stored next to the merge cache (see `utils.cache.load_fingerprint_key`)
+_fingerprint_key = os.urandom(FINGERPRINT_KEY_SIZE)
+
+# Objects notified of every change the pipeline makes to entries, e.g. the
+# plan writer of `--plan`. They implement `merged(source, target, uris_added)`
+# and `rewritten(entry)` (URIs changed in place).
+change_observers: list = []
+
+_LOGIN_KEYS = frozenset({"username", "password", "uris", "fido2Credentials", "totp"})
+_ENTRY_KEYS = frozenset({
+    "id", "type", "name", "favorite", "login", "passwordHistory", "revisionDate", "creationDate",
+    "deletedDate", "organizationId", "folderId", "reprompt", "notes", "collectionIds",
+})
+
+
+def set_fingerprint_key(key: bytes) -> None:
+    """Key fingerprints with *key* from now on."""
+    global _fingerprint_key
+    if len(key) != FINGERPRINT_KEY_SIZE:
+        raise ValueError(f"fingerprint key must be {FINGERPRINT_KEY_SIZE} bytes, got {len(key)}")
+    _fingerprint_key = key
+
+
+def _parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value.replace("Z", "+00:00")) if value else None
+
+
+def _format_timestamp(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat().replace("000+00:00", "Z") if value else None
+
+
+def _extras(data: dict, known: frozenset) -> Optional[dict]:
+    """Return the keys of *data* that are not in *known* (in order), or None."""
+    if not data.keys() - known:
+        return None
+    return {k: v for k, v in data.items() if k not in known}
+
+
+@dataclass(slots=True)
 class UriEntry:
     """Represents an entry inside `login.uris`."""
 
@@ -25,7 +72,7 @@ class UriEntry:
         return UriEntry(uri=data.get("uri", ""), match=data.get("match"))
 
 
-@dataclass
+@dataclass(slots=True)
 class LoginData:
     """Represents the `login` section of a Bitwarden entry."""
 
@@ -34,30 +81,44 @@ class LoginData:
     uris: list[UriEntry] = field(default_factory=list)
     fido2Credentials: list[dict] = field(default_factory=list)
     totp: Optional[str] = None
+    extras: Optional[dict] = None  # keys not modelled above, passed through as‑is
 
     def to_dict(self) -> dict:
-        return {
+        data = {
             "fido2Credentials": self.fido2Credentials or [],
             "uris": [u.to_dict() for u in self.uris] or None,
             "username": self.username or None,
             "password": self.password or None,
             "totp": self.totp,
         }
+        if self.extras:
+            data.update(self.extras)
+        return data
+
+    def shorten_uris(self) -> None:
+        for uri_entry in self.uris:
+            uri_entry.uri = shorten_uri(uri_entry.uri)
 
     @staticmethod
     def from_dict(data: dict) -> "LoginData":
         return LoginData(
             username=data.get("username", ""),
             password=data.get("password", ""),
-            uris=[UriEntry.from_dict(u) for u in data.get("uris", [])],
+            uris=[UriEntry.from_dict(u) for u in data.get("uris") or []],
             fido2Credentials=data.get("fido2Credentials", []),
             totp=data.get("totp"),
+            extras=_extras(data, _LOGIN_KEYS),
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class BitwardenEntry:
-    """Top‑level Bitwarden item (only *login* type relevant for this tool)."""
+    """Top‑level Bitwarden item (only *login* type relevant for this tool).
+
+    Timestamps are kept as the raw ISO strings from the export and are only
+    parsed when the `revisionDate` / `creationDate` / `deletedDate` properties
+    are read, so untouched entries round‑trip without re‑formatting.
+    """
 
     id: str
     type: int  # 1 = login, 2 = secure note, …
@@ -65,15 +126,51 @@ class BitwardenEntry:
     favorite: bool = False
     login: LoginData = field(default_factory=LoginData)
     passwordHistory: Optional[list] = None
-    revisionDate: Optional[datetime] = None
-    creationDate: Optional[datetime] = None
-    deletedDate: Optional[datetime] = None
+    rawRevisionDate: Optional[str] = None
+    rawCreationDate: Optional[str] = None
+    rawDeletedDate: Optional[str] = None
     organizationId: Optional[str] = None
     folderId: Optional[str] = None
     reprompt: int = 0
     notes: Optional[str] = None
     collectionIds: Optional[list] = None
+    extras: Optional[dict] = None  # keys not modelled above, passed through as‑is
+    # (username, password, key, fingerprint) the cached fingerprint was computed from
+    _fingerprint: Optional[tuple[str, str, bytes, str]] = field(default=None, init=False, repr=False, compare=False)
+
+
+    @property
+    def revisionDate(self) -> Optional[datetime]:
+        return _parse_timestamp(self.rawRevisionDate)
+
+    @revisionDate.setter
+    def revisionDate(self, value: Optional[datetime]) -> None:
+        self.rawRevisionDate = _format_timestamp(value)
+
+    @property
+    def creationDate(self) -> Optional[datetime]:
+        return _parse_timestamp(self.rawCreationDate)
 
+    @creationDate.setter
+    def creationDate(self, value: Optional[datetime]) -> None:
+        self.rawCreationDate = _format_timestamp(value)
+
+    @property
+    def deletedDate(self) -> Optional[datetime]:
+        return _parse_timestamp(self.rawDeletedDate)
+
+    @deletedDate.setter
+    def deletedDate(self, value: Optional[datetime]) -> None:
+        self.rawDeletedDate = _format_timestamp(value)
+
+
+    def shorten_uris(self) -> None:
+        """Shorten all URIs of this entry in place."""
+        before = [u.uri for u in self.login.uris] if change_observers else None
+        self.login.shorten_uris()
+        if before is not None and before != [u.uri for u in self.login.uris]:
+            for observer in change_observers:
+                observer.rewritten(self)
 
     def merge(self, other: "BitwardenEntry") -> "BitwardenEntry":
         """Merge another BitwardenEntry into this one
@@ -81,19 +178,45 @@ class BitwardenEntry:
         This function merges the `login` data of the source entry into the target
         entry, ensuring that duplicate URIs are not added.
         """
-        # Merge URIs, avoiding duplicates
-        existing_uris = {u.uri for u in self.login.uris}
-        for uri_entry in other.login.uris:
-            shortened_uri = shorten_uri(uri_entry.uri)
-            if shortened_uri and shortened_uri not in existing_uris:
-                self.login.uris.append(UriEntry(
-                    match=uri_entry.match,
-                    uri=shortened_uri,
-                ))
-                existing_uris.add(shortened_uri)
-                logger.debug(f"Added uri {shortened_uri} to {self.name} ({self.id}) from {other.name} ({other.id})")
-
-        logger.debug(f"Merged {other.name} ({other.id}) into {self.name} ({self.id})")
+        return self.merge_many((other,))
+
+    def merge_many(self, sources: Iterable["BitwardenEntry"]) -> "BitwardenEntry":
+        """Merge several entries into this one, in order.
+
+        Equivalent to calling `merge` for every source, but the set of known
+        URIs is built once per call and every distinct source URI is shortened
+        only once, so merging a large group in one call stays linear.
+        """
+        uris = self.login.uris
+        existing = {u.uri for u in uris}
+        seen: set[str] = set()  # raw source URIs already handled in this call
+        debug = logger.isEnabledFor(logging.DEBUG)
+        merged = added = 0
+        for other in sources:
+            start = len(uris)
+            for uri_entry in other.login.uris:
+                raw_uri = uri_entry.uri
+                if raw_uri in seen:
+                    continue
+                seen.add(raw_uri)
+                shortened_uri = shorten_uri(raw_uri)
+                if shortened_uri and shortened_uri not in existing:
+                    uris.append(UriEntry(
+                        match=uri_entry.match,
+                        uri=shortened_uri,
+                    ))
+                    existing.add(shortened_uri)
+                    added += 1
+                    if debug:
+                        logger.debug("Added uri %s to %s (%s) from %s (%s)", shortened_uri, self.name, self.id, other.name, other.id)
+            merged += 1
+            for observer in change_observers:
+                observer.merged(other, self, uris[start:])
+            if debug:
+                logger.debug("Merged %s (%s) into %s (%s)", other.name, other.id, self.name, self.id)
+
+        metrics.incr("merges", merged)
+        metrics.incr("uris_added", added)
 
         return self
 
@@ -101,52 +224,80 @@ class BitwardenEntry:
     def get_fingerprint(self) -> str:
         """Get a fingerprint for this entry.
 
-        The fingerprint is a hash of the entry's login data, including the username and password.
+        The fingerprint is a BLAKE2b hash of the entry's username and password,
+        keyed with the secret installed by `set_fingerprint_key` and prefixed
+        with `FINGERPRINT_VERSION`. It is computed once and cached; the cache
+        is invalidated as soon as `login.username`, `login.password` or the
+        key no longer match the values it was computed from.
+        """
+        username, password, key = self.login.username, self.login.password, _fingerprint_key
+        cached = self._fingerprint
+        if cached is not None and cached[0] == username and cached[1] == password and cached[2] is key:
+            return cached[3]
+
+        h = hashlib.blake2b(key=key, digest_size=16)
+        for value in (username or "", password or ""):
+            encoded = value.encode()
+            h.update(len(encoded).to_bytes(8, "little"))
+            h.update(encoded)
+        fingerprint = f"{_FINGERPRINT_PREFIX}{h.hexdigest()}"
+        self._fingerprint = (username, password, key, fingerprint)
+        return fingerprint
+
+    def get_legacy_fingerprint(self) -> str:
+        """Get the version 1 (MD5 over JSON) fingerprint of this entry.
+
+        Only used to match merge operations cached by older versions of the tool.
         """
         data = {
             "username": self.login.username,
             "password": self.login.password,
-            # "uris": [normalise_domain(u.uri) for u in self.login.uris],
         }
-        # Sort the URIs to ensure consistent hashing
-        # data["uris"].sort()
-        # Hash the data to create a fingerprint
-        fingerprint = hashlib.md5(json.dumps(data, sort_keys=True).encode()).hexdigest()
-        return str(fingerprint)
+        return hashlib.md5(json.dumps(data, sort_keys=True).encode()).hexdigest()
+
+    @staticmethod
+    def fingerprint_version(fingerprint: str) -> int:
+        """Return the version of the scheme that produced *fingerprint*."""
+        if fingerprint.startswith(_FINGERPRINT_PREFIX):
+            return FINGERPRINT_VERSION
+        return 1
 
 
     # ------------------------------------------------------------------
     # Factory helpers
     # ------------------------------------------------------------------
     @staticmethod
-    def from_dict(data: dict) -> "BitwardenEntry":
-        """Create a `BitwardenEntry` from raw JSON dict."""
-        parse_dt = lambda s: datetime.fromisoformat(s.replace("Z", "+00:00")) if s else None
+    def from_dict(data: dict, store: Optional["LoginStore"] = None) -> "BitwardenEntry":
+        """Create a `BitwardenEntry` from raw JSON dict.
+
+        With a *store*, the login data is kept in that columnar `LoginStore`
+        and the entry gets a view onto its row instead of a `LoginData`.
+        """
         return BitwardenEntry(
             id=data.get("id", str(uuid.uuid4())),
             type=data.get("type", 1),
             name=data.get("name", ""),
             favorite=bool(data.get("favorite")),
-            login=LoginData.from_dict(data.get("login", {})),
+            login=store.add(data.get("login") or {}) if store is not None else LoginData.from_dict(data.get("login") or {}),
             passwordHistory=data.get("passwordHistory"),
-            revisionDate=parse_dt(data.get("revisionDate")),
-            creationDate=parse_dt(data.get("creationDate")),
-            deletedDate=parse_dt(data.get("deletedDate")),
+            rawRevisionDate=data.get("revisionDate"),
+            rawCreationDate=data.get("creationDate"),
+            rawDeletedDate=data.get("deletedDate"),
             organizationId=data.get("organizationId"),
             folderId=data.get("folderId"),
             reprompt=data.get("reprompt", 0),
             notes=data.get("notes"),
             collectionIds=data.get("collectionIds"),
+            extras=_extras(data, _ENTRY_KEYS),
         )
 
     def to_dict(self) -> dict:
         """Serialise back into Bitwarden's JSON shape."""
-        fmt_dt = lambda dt: dt.isoformat().replace("000+00:00", "Z") if dt else None
-        return {
+        data = {
             "passwordHistory": self.passwordHistory,
-            "revisionDate": fmt_dt(self.revisionDate),
-            "creationDate": fmt_dt(self.creationDate),
-            "deletedDate": fmt_dt(self.deletedDate),
+            "revisionDate": self.rawRevisionDate,
+            "creationDate": self.rawCreationDate,
+            "deletedDate": self.rawDeletedDate,
             "id": self.id,
             "organizationId": self.organizationId,
             "folderId": self.folderId,
@@ -158,3 +309,7 @@ class BitwardenEntry:
             "login": self.login.to_dict(),
             "collectionIds": self.collectionIds,
         }
+        if self.extras:
+            data.update(self.extras)
+        return data
+
@@ -0,0 +1,220 @@
+from array import array
+from typing import Iterator, Optional
+
+from data.bitwarden import LoginData, UriEntry
+from utils.url import normalise_domain, shorten_uri
+
+_NO_MATCH = -1  # `UriEntry.match` of None in the match column
+
+
+class StringPool:
+    """Dictionary encoding: every distinct string is stored once and has an integer code."""
+
+    __slots__ = ("codes", "values")
+
+    def __init__(self):
+        self.codes: dict[Optional[str], int] = {}
+        self.values: list[Optional[str]] = []
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def encode(self, value: Optional[str]) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+class LoginStore:
+    """Columnar backing store for the `login` section of many entries.
+
+    Usernames, passwords and URIs are dictionary‑encoded into one `StringPool`
+    and kept as integer columns; the URIs of row *i* are
+    ``uri_values[uri_offsets[i]:uri_offsets[i + 1]]``. The rarely used
+    fields (passkeys, TOTP, unknown keys) are stored sparsely per row.
+
+    Entries get a `ColumnarLogin` view instead of a `LoginData`, so the rest of
+    the tool keeps working unchanged, while `deduplicate_items` and
+    `handle_common_credentials` group by integer codes (`credential_codes`,
+    `domain_codes`) without touching per‑URI objects. A row's URIs become
+    `UriEntry` objects only when `ColumnarLogin.uris` is accessed, e.g. when the
+    entry takes part in a merge.
+    """
+
+    def __init__(self):
+        self.pool = StringPool()
+        self.usernames = array("l")
+        self.passwords = array("l")
+        self.uri_offsets = array("l", [0])
+        self.uri_values = array("l")
+        self.uri_matches = array("b")
+        self.fido2: dict[int, Optional[list]] = {}
+        self.totp: dict[int, str] = {}
+        self.extras: dict[int, dict] = {}
+        self.materialised: dict[int, list[UriEntry]] = {}  # rows whose URIs are objects now
+        self._domains: dict[int, int] = {}  # URI code -> normalised domain code (-1: empty URI)
+        self._shortened: dict[int, int] = {}  # URI code -> shortened URI code
+
+    def __len__(self) -> int:
+        return len(self.usernames)
+
+    def add(self, data: dict) -> "ColumnarLogin":
+        """Append the raw `login` JSON *data* as a new row and return its view."""
+        template = LoginData.from_dict(data)
+        row = len(self.usernames)
+        encode = self.pool.encode
+        self.usernames.append(encode(template.username))
+        self.passwords.append(encode(template.password))
+        for uri_entry in template.uris:
+            self.uri_values.append(encode(uri_entry.uri))
+            self.uri_matches.append(_NO_MATCH if uri_entry.match is None else uri_entry.match)
+        self.uri_offsets.append(len(self.uri_values))
+        if template.fido2Credentials != []:
+            self.fido2[row] = template.fido2Credentials
+        if template.totp is not None:
+            self.totp[row] = template.totp
+        if template.extras is not None:
+            self.extras[row] = template.extras
+        return ColumnarLogin(self, row)
+
+    def _uri_codes(self, row: int) -> array:
+        return self.uri_values[self.uri_offsets[row]:self.uri_offsets[row + 1]]
+
+    def _owns(self, login) -> bool:
+        return isinstance(login, ColumnarLogin) and login.store is self
+
+    # ------------------------------------------------------------------
+    # Integer keys for grouping
+    # ------------------------------------------------------------------
+    def credential_codes(self, login) -> tuple[int, int]:
+        """(username, password) codes of *login* (any `LoginData`‑like object)."""
+        if self._owns(login):
+            return self.usernames[login.row], self.passwords[login.row]
+        return self.pool.encode(login.username), self.pool.encode(login.password)
+
+    def domain_codes(self, login) -> Iterator[int]:
+        """Codes of the normalised domains of every non‑empty URI of *login*.
+
+        Every distinct URI is normalised only once per store.
+        """
+        encode, values, domains = self.pool.encode, self.pool.values, self._domains
+        if self._owns(login) and login.row not in self.materialised:
+            uri_codes = self._uri_codes(login.row)
+        else:
+            uri_codes = [encode(u.uri) for u in login.uris]
+        for code in uri_codes:
+            domain = domains.get(code)
+            if domain is None:
+                uri = values[code]
+                domain = domains[code] = encode(normalise_domain(uri)) if uri else -1
+            if domain >= 0:
+                yield domain
+
+
+class ColumnarLogin:
+    """`LoginData`‑compatible view of one row of a `LoginStore`."""
+
+    __slots__ = ("store", "row")
+
+    def __init__(self, store: LoginStore, row: int):
+        self.store = store
+        self.row = row
+
+    def __repr__(self) -> str:
+        return f"ColumnarLogin(row={self.row}, username={self.username!r}, uris={len(self.uris)})"
+
+    @property
+    def username(self) -> Optional[str]:
+        return self.store.pool.values[self.store.usernames[self.row]]
+
+    @username.setter
+    def username(self, value: Optional[str]) -> None:
+        self.store.usernames[self.row] = self.store.pool.encode(value)
+
+    @property
+    def password(self) -> Optional[str]:
+        return self.store.pool.values[self.store.passwords[self.row]]
+
+    @password.setter
+    def password(self, value: Optional[str]) -> None:
+        self.store.passwords[self.row] = self.store.pool.encode(value)
+
+    @property
+    def fido2Credentials(self) -> Optional[list]:
+        return self.store.fido2.get(self.row, [])
+
+    @fido2Credentials.setter
+    def fido2Credentials(self, value: Optional[list]) -> None:
+        self.store.fido2[self.row] = value
+
+    @property
+    def totp(self) -> Optional[str]:
+        return self.store.totp.get(self.row)
+
+    @totp.setter
+    def totp(self, value: Optional[str]) -> None:
+        self.store.totp[self.row] = value
+
+    @property
+    def extras(self) -> Optional[dict]:
+        return self.store.extras.get(self.row)
+
+    @extras.setter
+    def extras(self, value: Optional[dict]) -> None:
+        self.store.extras[self.row] = value
+
+    @property
+    def uris(self) -> list[UriEntry]:
+        """The row's URIs as a (stable, mutable) list of `UriEntry` objects."""
+        store, row = self.store, self.row
+        uris = store.materialised.get(row)
+        if uris is None:
+            values = store.pool.values
+            start, end = store.uri_offsets[row], store.uri_offsets[row + 1]
+            uris = store.materialised[row] = [
+                UriEntry(uri=values[code], match=None if match == _NO_MATCH else match)
+                for code, match in zip(store.uri_values[start:end], store.uri_matches[start:end])
+            ]
+        return uris
+
+    @uris.setter
+    def uris(self, value: list[UriEntry]) -> None:
+        self.store.materialised[self.row] = value
+
+    def shorten_uris(self) -> None:
+        store, row = self.store, self.row
+        if row in store.materialised:
+            for uri_entry in store.materialised[row]:
+                uri_entry.uri = shorten_uri(uri_entry.uri)
+            return
+        encode, values, shortened = store.pool.encode, store.pool.values, store._shortened
+        for idx in range(store.uri_offsets[row], store.uri_offsets[row + 1]):
+            code = store.uri_values[idx]
+            short = shortened.get(code)
+            if short is None:
+                short = shortened[code] = encode(shorten_uri(values[code]))
+            store.uri_values[idx] = short
+
+    def to_dict(self) -> dict:
+        store, row = self.store, self.row
+        if row in store.materialised:
+            uris = [u.to_dict() for u in store.materialised[row]]
+        else:
+            values = store.pool.values
+            start, end = store.uri_offsets[row], store.uri_offsets[row + 1]
+            uris = [
+                {"match": None if match == _NO_MATCH else match, "uri": values[code]}
+                for code, match in zip(store.uri_values[start:end], store.uri_matches[start:end])
+            ]
+        data = {
+            "fido2Credentials": self.fido2Credentials or [],
+            "uris": uris or None,
+            "username": self.username or None,
+            "password": self.password or None,
+            "totp": self.totp,
+        }
+        if self.extras:
+            data.update(self.extras)
+        return data
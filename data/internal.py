@@ -40,3 +40,46 @@ class MergeOperation:
         }
 
 
+
+
+class ItemIndex:
+    """id → entry index over an items list, with O(1) tombstone removal.
+
+    Entries are looked up by Bitwarden id (ids are not guaranteed unique, e.g.
+    for Chrome imports, so every id maps to a list) and removed by marking them
+    as tombstones. `compact()` returns the surviving entries in their original
+    order in a single pass.
+    """
+
+    def __init__(self, items: list[BitwardenEntry]):
+        self.items = items
+        self.by_id: dict[str, list[BitwardenEntry]] = {}
+        self.removed: set[int] = set()  # id() of tombstoned entries
+        for item in items:
+            self.by_id.setdefault(item.id, []).append(item)
+
+    def find(self, entry_id: str, fingerprint: str, legacy: bool = False) -> BitwardenEntry | None:
+        """Return the live entry with *entry_id* whose fingerprint matches."""
+        for item in self.by_id.get(entry_id, ()):
+            if (item.get_legacy_fingerprint() if legacy else item.get_fingerprint()) == fingerprint:
+                return item
+        return None
+
+    def is_removed(self, item: BitwardenEntry) -> bool:
+        return id(item) in self.removed
+
+    def remove(self, item: BitwardenEntry) -> None:
+        """Tombstone *item* so it is neither found nor kept by `compact()`."""
+        if id(item) in self.removed:
+            return
+        self.removed.add(id(item))
+        candidates = self.by_id.get(item.id, [])
+        for idx, candidate in enumerate(candidates):
+            if candidate is item:
+                del candidates[idx]
+                break
+
+    def compact(self) -> list[BitwardenEntry]:
+        """Return the items that have not been removed, in original order."""
+        removed = self.removed
+        return [item for item in self.items if id(item) not in removed]
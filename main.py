@@ -21,51 +21,303 @@ can be imported straight back into Bitwarden.
 from __future__ import annotations
 
 import argparse
+import getpass
+import itertools
+import json
+import os
+import re
+import sys
 from pathlib import Path
 
+from data.columnar import LoginStore
+from tools.batch import run_batch
+from tools.breach_audit import BreachCorpus, audit_passwords
 from tools.common_credentials import handle_common_credentials
 from tools.deduplication import deduplicate_items
+from tools.near_duplicates import merge_near_duplicates
+from tools.plan import PlanWriter, apply_plan
+from tools.policy import Policy
+from utils.cache import CACHE_FILE, cache
+from utils.logger import logger
+from utils.manifest import Manifest
+from utils.metrics import metrics
+from utils.public_suffix import load_public_suffix_list
+from utils.snapshot import SnapshotStore, snapshot_key
+from utils.url import log_cache_stats
 from wrapper.bitwarden import BitwardenWrapper
-from wrapper.chrome import chrome_csv_to_items
+from wrapper.chrome import CSV_PROFILE_ALIASES, CSV_PROFILES, iter_csv_items
 
 
+SNAPSHOT_KEY_ENV = "BW_CLEANUP_SNAPSHOT_KEY"
+EXPORT_PASSWORD_ENV = "BW_CLEANUP_EXPORT_PASSWORD"
+
+
+def export_password() -> str:
+    return os.environ.get(EXPORT_PASSWORD_ENV) or getpass.getpass("Export password: ")
+
 
 def main(argv: list[str] | None = None) -> None:
     parser = argparse.ArgumentParser(
         description="Clean a Bitwarden JSON export and optionally merge Chrome passwords."
     )
-    parser.add_argument("bitwarden_json", type=Path, help="Path to Bitwarden .json export")
+    parser.add_argument("bitwarden_json", type=Path, nargs="?", help="Path to Bitwarden .json export")
+    parser.add_argument(
+        "--batch",
+        type=Path,
+        metavar="MANIFEST",
+        help="Clean every vault listed in a batch manifest (see tools/batch.py) instead of a single export; "
+             "--workers sets how many run in parallel",
+    )
     parser.add_argument(
         "-c",
         "--chrome-csv",
         type=Path,
         help="Path to Chrome passwords CSV export (optional)",
     )
+    parser.add_argument(
+        "--csv-profile",
+        choices=[profile.name for profile in CSV_PROFILES] + list(CSV_PROFILE_ALIASES),
+        help="Column layout of the passwords CSV (default: detect from header)",
+    )
     parser.add_argument(
         "-o", "--output",
         type=Path,
-        default="cleaned.json",
-        required=True,
-        help="Where to write the cleaned JSON"
+        help="Where to write the cleaned JSON (required unless --plan is given)"
+    )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="Write the cleaned JSON without indentation",
+    )
+    parser.add_argument(
+        "--plaintext-output",
+        action="store_true",
+        help="Write a password-protected export back unencrypted (by default it is re-encrypted "
+             f"with the same password, read from ${EXPORT_PASSWORD_ENV} or prompted)",
+    )
+    parser.add_argument(
+        "--columnar",
+        action="store_true",
+        help="Keep login data in a dictionary-encoded columnar store (less memory for very large vaults)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Vaults processed in parallel with --batch (0: one per CPU)",
+    )
+    parser.add_argument(
+        "--near-duplicates",
+        action="store_true",
+        help="Also merge entries with identical credentials on the same registrable domain "
+             "(e.g. login.example.com and accounts.example.com)",
+    )
+    parser.add_argument(
+        "--public-suffix-list",
+        type=Path,
+        help="public_suffix_list.dat to use instead of the embedded suffix table",
+    )
+    parser.add_argument(
+        "--cache",
+        type=Path,
+        default=CACHE_FILE,
+        help="Merge decision cache, loaded only when needed (.db/.sqlite for SQLite; default: %(default)s)",
+    )
+    parser.add_argument(
+        "--policy",
+        type=Path,
+        help="JSON merge policy that decides shared-credential groups without prompting",
+    )
+
+    parser.add_argument(
+        "--breach-corpus",
+        type=Path,
+        help="Check passwords against this offline breach corpus (see `python -m tools.breach_audit`)",
+    )
+    parser.add_argument(
+        "--audit-report",
+        type=Path,
+        help="Write the breached/reused password report to this JSON file",
+    )
+    parser.add_argument(
+        "--audit-tag",
+        action="store_true",
+        help="Tag breached/reused entries with a custom field in the output",
+    )
+    parser.add_argument(
+        "--metrics-json",
+        type=Path,
+        help="Write per-stage timings and counters (with --batch: the combined summary) to this JSON file",
+    )
+    parser.add_argument(
+        "--profile",
+        type=Path,
+        help="Write a cProfile profile of the run to this file (view with `python -m pstats`)",
+    )
+
+    plan_mode = parser.add_mutually_exclusive_group()
+    plan_mode.add_argument(
+        "--plan",
+        type=Path,
+        help="Dry run: write the merges and URI rewrites the run would make as a JSON Lines plan "
+             "(cached group decisions are replayed, nothing is prompted) instead of the cleaned export",
+    )
+    plan_mode.add_argument(
+        "--apply-plan",
+        type=Path,
+        help="Apply a plan written by --plan to the export instead of analysing it",
+    )
+    parser.add_argument(
+        "--snapshot-dir",
+        type=Path,
+        help=f"Cache an encrypted snapshot of the parsed and deduplicated vault here and reuse it on "
+             f"reruns with the same inputs (key from ${SNAPSHOT_KEY_ENV} or prompted)",
+    )
+    parser.add_argument(
+        "--incremental",
+        type=Path,
+        metavar="MANIFEST",
+        help="Keep a manifest of this run and only revisit new or changed items and groups next time",
+    )
+    parser.add_argument(
+        "--reopen-groups",
+        metavar="REGEX",
+        nargs="?",
+        const="",
+        type=re.compile,
+        help="With --incremental, decide already reviewed shared-credential groups again "
+             "(all of them, or those whose username matches REGEX)",
     )
 
     args = parser.parse_args(argv)
+    if args.batch:
+        summary = run_batch(args.batch, workers=args.workers)
+        if args.metrics_json:
+            args.metrics_json.write_text(json.dumps(summary, indent=2, ensure_ascii=False), encoding="utf-8")
+            logger.info(f"Wrote batch summary to {args.metrics_json}")
+        if summary["totals"]["failed"]:
+            sys.exit(1)
+        return
+    if args.bitwarden_json is None:
+        parser.error("the following arguments are required: bitwarden_json (or --batch)")
+    if args.output is None and not args.plan:
+        parser.error("the following arguments are required: -o/--output")
+    if args.plan and (args.snapshot_dir or args.incremental):
+        parser.error("--plan cannot be combined with --snapshot-dir or --incremental")
+    if args.reopen_groups is not None and not args.incremental:
+        parser.error("--reopen-groups requires --incremental")
+    if args.apply_plan and (args.snapshot_dir or args.incremental):
+        parser.error("--apply-plan cannot be combined with --snapshot-dir or --incremental")
+    # a dry run must not touch the cache, not even to migrate legacy records
+    cache.configure(args.cache, read_only=bool(args.plan))
+    if args.public_suffix_list:
+        load_public_suffix_list(args.public_suffix_list)
+    policy = Policy.load(args.policy) if args.policy else None
+    manifest = Manifest(args.incremental, reopen=args.reopen_groups) if args.incremental else None
+
+    profiler = None
+    if args.profile:
+        import cProfile
+
+        profiler = cProfile.Profile()
+        profiler.enable()
 
     bitwarden = BitwardenWrapper()
-    parsed_entries = bitwarden.load(args.bitwarden_json)
+    store = LoginStore() if args.columnar else None
+    plan = PlanWriter(args.plan) if args.plan else None
+    snapshots, snapshot = None, None
+    if args.snapshot_dir:
+        passphrase = os.environ.get(SNAPSHOT_KEY_ENV) or getpass.getpass("Snapshot key: ")
+        snapshots = SnapshotStore(args.snapshot_dir, passphrase)
+        key = snapshot_key(args.bitwarden_json, args.chrome_csv, options=f"csv_profile={args.csv_profile}")
+        with metrics.timer("snapshot_load"):
+            snapshot = snapshots.load(key)
 
-    parsed_items = deduplicate_items(parsed_entries)
+    if snapshot is not None:
+        # 1.+2. Parsed, deduplicated and merged state from an earlier run
+        parsed_items = snapshot["entries"]
+        bitwarden.metadata = snapshot["metadata"]
+        bitwarden.other_items = snapshot["other_items"]
+        if snapshot.get("encrypted"):
+            bitwarden.unlock(args.bitwarden_json, export_password)
+        metrics.incr("snapshot_hits")
+    elif args.apply_plan:
+        with metrics.timer("load"):
+            parsed_entries = bitwarden.load(args.bitwarden_json, password=export_password)
+        with metrics.timer("apply_plan"):
+            parsed_items = apply_plan(args.apply_plan, parsed_entries)
+    else:
+        with metrics.timer("load"):
+            parsed_entries = bitwarden.load(args.bitwarden_json, store=store, password=export_password)
+            if store is not None:
+                logger.info(f"Columnar store: {len(store)} logins, {len(store.pool)} distinct strings")
 
-    # 2. Optionally merge Chrome entries
-    if args.chrome_csv:
-        chrome_items = chrome_csv_to_items(args.chrome_csv)
-        combined = deduplicate_items(parsed_items + chrome_items)
-        parsed_items = combined
+        with metrics.timer("dedup"):
+            if manifest is not None:
+                manifest.refresh(parsed_entries)
+            parsed_items = deduplicate_items(
+                parsed_entries,
+                manifest=manifest,
+                store=store,
+            )
+
+        # 2. Optionally merge Chrome entries
+        if args.chrome_csv:
+            with metrics.timer("chrome_merge"):
+                chrome_items = iter_csv_items(args.chrome_csv, profile=args.csv_profile)
+                combined = deduplicate_items(itertools.chain(parsed_items, chrome_items), store=store)
+                parsed_items = combined
+
+        if snapshots is not None:
+            with metrics.timer("snapshot_save"):
+                snapshots.save(key, {
+                    "entries": parsed_items,
+                    "metadata": bitwarden.metadata,
+                    "other_items": bitwarden.other_items,
+                    "encrypted": bitwarden.encryption is not None,
+                })
+
+    if args.near_duplicates and not args.apply_plan:
+        with metrics.timer("near_duplicates"):
+            parsed_items = merge_near_duplicates(parsed_items)
 
     # 3. Handle common credentials
-    parsed_items = handle_common_credentials(parsed_items)
+    if not args.apply_plan:
+        with metrics.timer("common_credentials"):
+            parsed_items = handle_common_credentials(
+                parsed_items, policy=policy, manifest=manifest, store=store, interactive=plan is None
+            )
+
+    if plan is not None:
+        plan.close(parsed_items, parsed_entries)
+
+    # 4. Optionally audit breached / reused passwords
+    if plan is None and (args.breach_corpus or args.audit_report or args.audit_tag):
+        with metrics.timer("audit"):
+            corpus = BreachCorpus(args.breach_corpus) if args.breach_corpus else None
+            report = audit_passwords(parsed_items, corpus, tag=args.audit_tag)
+            if corpus is not None:
+                corpus.close()
+        if args.audit_report:
+            args.audit_report.write_text(json.dumps(report.to_dict(), indent=2, ensure_ascii=False), encoding="utf-8")
+            logger.info(f"Wrote password audit report to {args.audit_report}")
+
+    if plan is None:
+        with metrics.timer("save"):
+            bitwarden.save(args.output, parsed_items, compact=args.compact, encrypt=not args.plaintext_output)
+
+    if manifest is not None:
+        manifest.save()
+
+    if profiler:
+        profiler.disable()
+        profiler.dump_stats(args.profile)
+        logger.info(f"Wrote profile to {args.profile}")
 
-    bitwarden.save(args.output, parsed_items)
+    log_cache_stats()
+    metrics.log_summary()
+    if args.metrics_json:
+        metrics.dump(args.metrics_json)
 
 if __name__ == "__main__":  # pragma: no cover
     main()
@@ -0,0 +1,38 @@
+"""Builders for small Bitwarden exports used by the tests."""
+import itertools
+import json
+from pathlib import Path
+
+_ids = itertools.count(1)
+
+
+def login_item(name: str, username: str, password: str, uris: list[str], **fields) -> dict:
+    item = {
+        "passwordHistory": None,
+        "revisionDate": "2024-01-01T00:00:00.000Z",
+        "creationDate": "2024-01-01T00:00:00.000Z",
+        "deletedDate": None,
+        "id": f"00000000-0000-4000-8000-{next(_ids):012d}",
+        "organizationId": None,
+        "folderId": None,
+        "type": 1,
+        "reprompt": 0,
+        "name": name,
+        "notes": None,
+        "favorite": False,
+        "login": {
+            "fido2Credentials": [],
+            "uris": [{"match": None, "uri": uri} for uri in uris],
+            "username": username,
+            "password": password,
+            "totp": None,
+        },
+        "collectionIds": None,
+    }
+    item.update(fields)
+    return item
+
+
+def write_export(path: Path, items: list[dict]) -> Path:
+    path.write_text(json.dumps({"encrypted": False, "folders": [], "items": items}, indent=2), encoding="utf-8")
+    return path
@@ -0,0 +1,46 @@
+import json
+
+import pytest
+
+from tests.helpers import login_item, write_export
+from tools.batch import load_batch, run_batch
+
+
+def test_batch_with_partial_policy_never_prompts(tmp_path):
+    write_export(tmp_path / "alice.json", [
+        # covered by the policy rule
+        login_item("a", "alice@work.example", "pw1", ["https://a.example"]),
+        login_item("b", "alice@work.example", "pw1", ["https://b.example"]),
+        # no rule covers this group
+        login_item("c", "alice@home.example", "pw2", ["https://c.example"]),
+        login_item("d", "alice@home.example", "pw2", ["https://d.example"]),
+    ])
+    (tmp_path / "policy.json").write_text(json.dumps({
+        "rules": [{"name": "work", "username": ".*@work\\.example"}],
+    }))
+    (tmp_path / "batch.json").write_text(json.dumps({
+        "policy": "policy.json",
+        "vaults": [{"name": "alice", "export": "alice.json", "output": "out/alice.json"}],
+    }))
+
+    summary = run_batch(tmp_path / "batch.json")
+
+    (vault,) = summary["vaults"]
+    assert vault["status"] == "ok", vault.get("error")
+    names = sorted(item["name"] for item in json.loads((tmp_path / "out/alice.json").read_text())["items"])
+    assert names == ["a", "c", "d"]
+
+
+@pytest.mark.parametrize("second", [
+    {"name": "b", "export": "b.json", "output": "out/../out/a.json"},
+    {"name": "b", "export": "b.json", "output": "out/b.json", "cache": "out/a.cache.json"},
+    {"name": "b", "export": "b.json", "output": "out/a.cache.json"},
+])
+def test_batch_rejects_shared_output_or_cache(tmp_path, second):
+    (tmp_path / "out").mkdir()
+    (tmp_path / "batch.json").write_text(json.dumps({
+        "vaults": [{"name": "a", "export": "a.json", "output": "out/a.json"}, second],
+    }))
+
+    with pytest.raises(SystemExit, match="more than once"):
+        load_batch(tmp_path / "batch.json")
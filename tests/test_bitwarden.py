@@ -0,0 +1,24 @@
+from data.bitwarden import BitwardenEntry
+from tests.helpers import login_item
+
+
+def _entry(*uris):
+    return BitwardenEntry.from_dict(login_item("a", "u", "p", list(uris)))
+
+
+def test_merge_many_skips_known_and_repeated_uris():
+    target = _entry("https://a.example/login")
+
+    target.merge_many([_entry("https://a.example/login?next=1", "https://b.example"), _entry("https://b.example")])
+
+    assert [u.uri for u in target.login.uris] == ["https://a.example/login", "https://b.example"]
+
+
+def test_merge_sees_uris_changed_in_place():
+    target = _entry("https://a.example")
+    target.merge(_entry("https://b.example"))
+    target.login.uris[0].uri = "https://c.example"
+
+    target.merge(_entry("https://c.example"))
+
+    assert [u.uri for u in target.login.uris] == ["https://c.example", "https://b.example"]
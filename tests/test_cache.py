@@ -0,0 +1,88 @@
+from data.bitwarden import BitwardenEntry
+from data.internal import ItemIndex
+from tests.helpers import login_item
+from utils import cache as cache_module
+from utils.cache import Cache
+
+
+def _entries():
+    source = BitwardenEntry.from_dict(login_item("a", "u", "p", ["https://a.example"]))
+    target = BitwardenEntry.from_dict(login_item("b", "u", "p", ["https://b.example"]))
+    return source, target
+
+
+def test_append_after_torn_journal_record_survives_reload(tmp_path):
+    path = tmp_path / "cache.json"
+    (tmp_path / "cache.json.journal").write_text('{"source_id": "x", "source_finger')
+    source, target = _entries()
+
+    first = Cache(path)
+    first.add(source, target)
+    first.backend.close()
+
+    assert Cache(path).exists(source)
+
+
+def test_append_never_continues_a_torn_line(tmp_path):
+    path = tmp_path / "cache.json"
+    source, target = _entries()
+    cache = Cache(path)
+    cache.exists(source)  # load the (empty) cache first
+    (tmp_path / "cache.json.journal").write_text('{"source_id": "x", "source_finger')
+
+    cache.add(source, target)
+    cache.backend.close()
+
+    assert Cache(path).exists(source)
+
+
+def test_compaction_is_proportional_to_the_snapshot(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache_module, "COMPACT_MIN_RECORDS", 10)
+    cache = Cache(tmp_path / "cache.json")
+    compactions = []
+    compact = cache.backend.compact
+    monkeypatch.setattr(cache.backend, "compact", lambda ops: (compactions.append(len(ops)), compact(ops)))
+    for idx in range(200):
+        source = BitwardenEntry.from_dict(login_item(f"s{idx}", "u", "p", []))
+        cache.add(source, source)
+
+    # the journal may grow to half the snapshot before it is folded in
+    assert compactions == [10, 20, 30, 45, 68, 102, 153]
+
+
+def test_read_only_cache_never_writes(tmp_path):
+    source, target = _entries()
+    for name in ("cache.json", "cache.db"):
+        cache = Cache(tmp_path / name, read_only=True)
+        cache.add(source, target)
+
+        assert cache.exists(source)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_replay_applies_chained_decisions_in_order(tmp_path):
+    a, b, c = (BitwardenEntry.from_dict(login_item(name, "u", "p", [f"https://{name}.example"])) for name in "abc")
+    cache = Cache(tmp_path / "cache.json")
+    cache.add(c, b)
+    cache.add(b, a)
+    index = ItemIndex([c, b, a])
+
+    assert cache.replay([c, b, a], index) == 2
+    assert index.compact() == [a]
+    assert [uri.uri for uri in a.login.uris] == ["https://a.example", "https://b.example", "https://c.example"]
+
+
+def test_fingerprints_are_keyed_by_a_private_key_next_to_the_cache(tmp_path):
+    entry, _ = _entries()
+    first, second = Cache(), Cache()
+    for name in ("one", "two"):
+        (tmp_path / name).mkdir()
+    first.configure(tmp_path / "one" / "cache.json")
+    fingerprint = entry.get_fingerprint()
+    second.configure(tmp_path / "two" / "cache.json")
+    other = entry.get_fingerprint()
+    first.configure(tmp_path / "one" / "cache.json")
+
+    assert (tmp_path / "one" / "cache.json.key").stat().st_mode & 0o777 == 0o600
+    assert other != fingerprint
+    assert entry.get_fingerprint() == fingerprint
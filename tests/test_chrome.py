@@ -0,0 +1,26 @@
+import pytest
+
+from wrapper.chrome import CSV_PROFILES, detect_csv_profile, iter_csv_items
+
+
+@pytest.mark.parametrize("header, expected", [
+    (["url", "username", "password", "httpRealm", "formActionOrigin", "guid"], "firefox"),
+    (["Title", "URL", "Username", "Password", "Notes", "OTPAuth"], "safari"),
+    (["name", "url", "username", "password", "note"], "chrome"),
+    (["origin", "accountName", "password"], "chrome"),
+])
+def test_detect_csv_profile(header, expected):
+    assert detect_csv_profile(header).name == expected
+
+
+def test_catch_all_profile_is_last():
+    assert [profile.name for profile in CSV_PROFILES if not profile.signature] == [CSV_PROFILES[-1].name]
+
+
+def test_edge_profile_is_an_alias(tmp_path):
+    path = tmp_path / "edge.csv"
+    path.write_text("name,url,username,password\nexample,https://example.com/login,user,pw\n")
+
+    (item,) = iter_csv_items(path, profile="edge")
+
+    assert (item.name, item.login.username, item.login.password) == ("example", "user", "pw")
@@ -0,0 +1,27 @@
+from rich.prompt import Confirm, Prompt
+
+from data.bitwarden import BitwardenEntry
+from tests.helpers import login_item
+from tools import common_credentials
+from utils.cache import Cache
+
+
+def test_interactive_group_only_offers_live_members(tmp_path, monkeypatch):
+    a, b, c = (BitwardenEntry.from_dict(login_item(name, "u", "p", [f"https://{name}.example"])) for name in "abc")
+    cache = Cache(tmp_path / "cache.json")
+    cache.add(b, a)  # b was merged into a in an earlier run
+    monkeypatch.setattr(common_credentials, "cache", cache)
+    offered = []
+
+    def choose(prompt, choices, **kwargs):
+        offered.extend(choices)
+        return "1"  # b's index in the full group
+
+    monkeypatch.setattr(Confirm, "ask", lambda *args, **kwargs: True)
+    monkeypatch.setattr(Prompt, "ask", choose)
+
+    remaining = common_credentials.handle_common_credentials([a, b, c])
+
+    assert offered == ["0", "1"]
+    assert remaining == [c]
+    assert {uri.uri for uri in c.login.uris} == {"https://a.example", "https://b.example", "https://c.example"}
@@ -0,0 +1,35 @@
+import itertools
+
+import pytest
+
+from data.bitwarden import BitwardenEntry
+from tests.helpers import login_item
+from tools.deduplication import deduplicate_items
+
+VAULT = [
+    login_item("x", "u", "p", ["https://x.example/login"]),
+    login_item("y", "u", "p", ["https://y.example/login"]),
+    login_item("bridge", "u", "p", ["https://y.example/", "https://x.example/account"]),
+    login_item("other", "u", "q", ["https://x.example"]),
+]
+
+
+def _dedup(items):
+    return deduplicate_items(BitwardenEntry.from_dict(item) for item in items)
+
+
+def test_item_bridging_two_entries_merges_all_three():
+    merged, other = _dedup(VAULT)
+
+    assert merged.name == "x"
+    assert [uri.uri for uri in merged.login.uris] == [
+        "https://x.example/login", "https://y.example/login", "https://y.example/", "https://x.example/account",
+    ]
+    assert other.name == "other"
+
+
+@pytest.mark.parametrize("order", list(itertools.permutations(range(3))))
+def test_cluster_is_merged_into_its_first_item(order):
+    items = [VAULT[idx] for idx in order] + [VAULT[3]]
+
+    assert [item.name for item in _dedup(items)] == [VAULT[order[0]]["name"], "other"]
@@ -0,0 +1,70 @@
+import base64
+import json
+
+import pytest
+
+pytest.importorskip("cryptography")
+
+from tests.helpers import login_item, write_export
+from utils.export_crypto import KDF_ARGON2ID, KDF_PBKDF2, ExportEncryption, WrongPassword, is_password_protected
+from wrapper.bitwarden import BitwardenWrapper
+
+KDFS = [
+    pytest.param({"kdf_type": KDF_PBKDF2, "iterations": 1000}, id="pbkdf2"),
+    pytest.param({"kdf_type": KDF_ARGON2ID, "iterations": 1, "memory": 1, "parallelism": 1}, id="argon2id"),
+]
+
+
+@pytest.mark.parametrize("kdf", KDFS)
+def test_round_trip(kdf):
+    envelope = ExportEncryption.create("hunter2", **kdf).seal(b'{"items": []}')
+
+    assert is_password_protected(envelope)
+    assert ExportEncryption.unlock(envelope, "hunter2").decrypt(envelope["data"]) == b'{"items": []}'
+
+
+def test_wrong_password():
+    envelope = ExportEncryption.create("hunter2", iterations=1000).seal(b"{}")
+
+    with pytest.raises(WrongPassword):
+        ExportEncryption.unlock(envelope, "hunter3")
+
+
+def test_tampered_mac():
+    encryption = ExportEncryption.create("hunter2", iterations=1000)
+    envelope = encryption.seal(b"{}")
+    iv, ciphertext, mac = envelope["data"][2:].split("|")
+    flipped = bytes([base64.b64decode(mac)[0] ^ 1]) + base64.b64decode(mac)[1:]
+    envelope["data"] = f"2.{iv}|{ciphertext}|{base64.b64encode(flipped).decode()}"
+
+    with pytest.raises(WrongPassword):
+        ExportEncryption.unlock(envelope, "hunter2").decrypt(envelope["data"])
+
+
+@pytest.mark.parametrize("kdf", KDFS)
+def test_wrapper_decrypts_and_reencrypts(tmp_path, kdf):
+    plain = write_export(tmp_path / "plain.json", [
+        login_item("a", "u", "p", ["https://a.example"]),
+        {"type": 2, "id": "note", "name": "n", "secureNote": {"type": 0}},
+    ])
+    encrypted = tmp_path / "encrypted.json"
+    encrypted.write_text(json.dumps(ExportEncryption.create("hunter2", **kdf).seal(plain.read_bytes())))
+
+    wrapper = BitwardenWrapper()
+    entries = wrapper.load(encrypted, password=lambda: "hunter2")
+    wrapper.save(tmp_path / "out.json", entries)
+    wrapper.save(tmp_path / "out.plain.json", entries, encrypt=False)
+
+    assert [entry.name for entry in entries] == ["a"]
+    sealed = json.loads((tmp_path / "out.json").read_text())
+    decrypted = ExportEncryption.unlock(sealed, "hunter2").decrypt(sealed["data"])
+    assert decrypted == (tmp_path / "out.plain.json").read_bytes()
+    assert json.loads(decrypted)["items"][1]["id"] == "note"
+
+
+def test_wrapper_wrong_password_exits(tmp_path):
+    encrypted = tmp_path / "encrypted.json"
+    encrypted.write_text(json.dumps(ExportEncryption.create("hunter2", iterations=1000).seal(b'{"items": []}')))
+
+    with pytest.raises(SystemExit, match="Wrong password"):
+        BitwardenWrapper().load(encrypted, password=lambda: "nope")
@@ -0,0 +1,49 @@
+import io
+import json
+
+import pytest
+
+from utils.json_stream import JsonStreamReader
+
+DOCUMENT = {
+    "encrypted": False,
+    "total": 12345.678e-2,
+    "items": [{"name": "a", "uris": ["https://a.example"]}, -98765, "text é \\\" ]", True, None, [1, [2.5, 3]]],
+    "empty": {},
+}
+
+
+def _walk(reader: JsonStreamReader) -> str:
+    """Rebuild the compact document from the keys and raw spans the reader yields."""
+    parts = []
+    for key in reader.iter_object():
+        if key == "items":
+            values = []
+            for _ in reader.iter_array():
+                values.append(reader.read_value())
+            assert [value for value, _ in values] == DOCUMENT["items"]
+            raw = "[" + ",".join(raw for _, raw in values) + "]"
+        else:
+            value, raw = reader.read_value()
+            assert value == DOCUMENT[key]
+        parts.append(f"{json.dumps(key)}:{raw}")
+    return "{" + ",".join(parts) + "}"
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 5, 7, 64])
+def test_raw_spans_round_trip_across_chunk_borders(chunk_size):
+    text = json.dumps(DOCUMENT, separators=(",", ":"))
+
+    assert _walk(JsonStreamReader(io.StringIO(text), chunk_size=chunk_size)) == text
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 4])
+def test_number_cut_at_a_chunk_border(chunk_size):
+    reader = JsonStreamReader(io.StringIO("[123.5e2 , 7]"), chunk_size=chunk_size)
+
+    values = []
+    for _ in reader.iter_array():
+        values.append(reader.read_value())
+
+    assert values == [(123.5e2, "123.5e2"), (7, "7")]
+    assert JsonStreamReader(io.StringIO("-1024"), chunk_size=chunk_size).read_value() == (-1024, "-1024")
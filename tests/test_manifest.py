@@ -0,0 +1,83 @@
+import copy
+import re
+
+from data.bitwarden import BitwardenEntry
+from tests.helpers import login_item
+from tools.deduplication import deduplicate_items
+from utils.manifest import Manifest
+
+VAULT = [
+    login_item("a", "u1", "p1", ["https://a.example/login"]),
+    login_item("a2", "u1", "p1", ["https://www.a.example/"]),
+    login_item("b", "u1", "p1", ["https://b.example/login"]),
+    login_item("c", "u2", "p2", ["https://c.example"]),
+    login_item("c2", "u2", "p2", ["https://c.example/account", "https://d.example"]),
+]
+
+
+def _entries(items):
+    return [BitwardenEntry.from_dict(copy.deepcopy(item)) for item in items]
+
+
+def _dedup(entries, manifest=None):
+    if manifest is not None:
+        manifest.refresh(entries)
+    return [entry.to_dict() for entry in deduplicate_items(entries, manifest=manifest)]
+
+
+def _previous_run(path):
+    manifest = Manifest(path)
+    _dedup(_entries(VAULT), manifest)
+    manifest.save()
+    return Manifest(path)
+
+
+def test_unchanged_vault_reuses_every_cluster(tmp_path):
+    manifest = _previous_run(tmp_path / "manifest.json")
+    entries = _entries(VAULT)
+
+    assert _dedup(entries, manifest) == _dedup(_entries(VAULT))
+    assert [manifest.previous_cluster(entry) is not None for entry in entries] == [True] * 5
+
+
+def test_changed_uri_of_same_length_is_not_reused(tmp_path):
+    manifest = _previous_run(tmp_path / "manifest.json")
+    changed = copy.deepcopy(VAULT)
+    changed[2]["login"]["uris"][0]["uri"] = "https://a.example/other"  # b now duplicates a
+    changed[4]["login"]["uris"][1]["uri"] = "https://e.example"
+    entries = _entries(changed)
+
+    assert _dedup(entries, manifest) == _dedup(_entries(changed))
+    assert manifest.previous_cluster(entries[4]) is None
+
+
+def test_changed_member_invalidates_its_old_cluster(tmp_path):
+    manifest = _previous_run(tmp_path / "manifest.json")
+    changed = copy.deepcopy(VAULT)
+    changed[3]["login"]["password"] = "other"  # c no longer duplicates c2
+    del changed[1]  # a2 is gone
+    entries = _entries(changed)
+
+    assert _dedup(entries, manifest) == _dedup(_entries(changed))
+    assert [manifest.previous_cluster(entry) is not None for entry in entries] == [False, True, False, False]
+
+
+def test_manifest_stores_no_uris_or_credentials(tmp_path):
+    path = tmp_path / "manifest.json"
+    _previous_run(path)
+    text = path.read_text()
+
+    assert not any(word in text for word in ("example", "u1", "p1"))
+
+
+def test_reopen_groups(tmp_path):
+    path = tmp_path / "manifest.json"
+    group = _entries(VAULT[:2])
+    manifest = Manifest(path)
+    manifest.mark_reviewed(group)
+    manifest.save()
+
+    assert Manifest(path).is_reviewed(group)
+    assert not Manifest(path, reopen=re.compile("")).is_reviewed(group)
+    assert not Manifest(path, reopen=re.compile("^u1$")).is_reviewed(group)
+    assert Manifest(path, reopen=re.compile("^u2$")).is_reviewed(group)
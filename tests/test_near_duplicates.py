@@ -0,0 +1,28 @@
+from data.bitwarden import BitwardenEntry
+from tests.helpers import login_item
+from tools.near_duplicates import merge_near_duplicates
+
+
+def _names(items):
+    return [item.name for item in items]
+
+
+def test_merges_subdomains_of_one_registrable_domain():
+    items = [
+        BitwardenEntry.from_dict(login_item("login", "u", "p", ["https://login.example.com"])),
+        BitwardenEntry.from_dict(login_item("accounts", "u", "p", ["https://accounts.example.com/signin"])),
+        BitwardenEntry.from_dict(login_item("pages", "u", "p", ["https://a.github.io"])),
+        BitwardenEntry.from_dict(login_item("other pages", "u", "p", ["https://b.github.io"])),
+    ]
+
+    assert _names(merge_near_duplicates(items)) == ["login", "pages", "other pages"]
+
+
+def test_app_uris_are_not_reduced_to_registrable_domains():
+    items = [
+        BitwardenEntry.from_dict(login_item("app", "u", "p", ["androidapp://com.example.app"])),
+        BitwardenEntry.from_dict(login_item("site", "u", "p", ["https://www.example.app"])),
+        BitwardenEntry.from_dict(login_item("same app", "u", "p", ["androidapp://com.example.app"])),
+    ]
+
+    assert _names(merge_near_duplicates(items)) == ["app", "site"]
@@ -0,0 +1,23 @@
+import json
+
+import main
+from tests.helpers import login_item, write_export
+
+
+def test_plan_with_policy_applies_like_a_full_run(tmp_path):
+    export = write_export(tmp_path / "vault.json", [
+        login_item("a", "u", "p", ["https://a.example/login?x=1"]),
+        login_item("a2", "u", "p", ["https://a.example/login"]),
+        login_item("b", "u", "p", ["https://b.example"]),
+        login_item("c", "v", "q", ["https://c.example"]),
+    ])
+    (tmp_path / "policy.json").write_text(json.dumps({"rules": [{"name": "all"}]}))
+    common = [str(export), "--policy", str(tmp_path / "policy.json")]
+
+    main.main(common + ["-o", str(tmp_path / "full.json"), "--cache", str(tmp_path / "full-cache.json")])
+    main.main(common + ["--plan", str(tmp_path / "plan.jsonl"), "--cache", str(tmp_path / "cache.json")])
+    main.main([str(export), "--apply-plan", str(tmp_path / "plan.jsonl"), "-o", str(tmp_path / "applied.json"),
+               "--cache", str(tmp_path / "cache.json")])
+
+    assert (tmp_path / "applied.json").read_bytes() == (tmp_path / "full.json").read_bytes()
+    assert not (tmp_path / "cache.json").exists() and not (tmp_path / "cache.json.journal").exists()
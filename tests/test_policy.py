@@ -0,0 +1,24 @@
+import pytest
+
+from data.bitwarden import BitwardenEntry
+from tests.helpers import login_item
+from tools.policy import PolicyRule
+
+
+def test_never_merge_across_collections():
+    rule = PolicyRule.from_dict({"name": "default", "never_merge_across": ["collectionIds"]})
+    group = [
+        BitwardenEntry.from_dict(login_item("a", "u", "p", [], collectionIds=["c1", "c2"])),
+        BitwardenEntry.from_dict(login_item("b", "u", "p", [], collectionIds=["c2", "c1"])),
+        BitwardenEntry.from_dict(login_item("c", "u", "p", [], collectionIds=["c3"])),
+    ]
+
+    ((target, sources),) = rule.plan(group)
+
+    assert target.name == "a"
+    assert [item.name for item in sources] == ["b"]
+
+
+def test_never_merge_across_rejects_unhashable_attributes():
+    with pytest.raises(ValueError, match="cannot split groups by 'passwordHistory'"):
+        PolicyRule.from_dict({"name": "bad", "never_merge_across": ["passwordHistory"]})
@@ -0,0 +1,43 @@
+import pytest
+
+from data.bitwarden import BitwardenEntry
+from tests.helpers import login_item
+from utils import snapshot
+from utils.snapshot import SnapshotStore, _pack, _unpack, snapshot_key
+
+
+def test_pack_round_trip():
+    entry = BitwardenEntry.from_dict(login_item(
+        "a", "u", "p", ["https://a.example", "androidapp://com.example"],
+        folderId="f", collectionIds=["c"], notes="n", favorite=True, customKey={"x": 1},
+    ))
+
+    assert _unpack(_pack(entry)).to_dict() == entry.to_dict()
+
+
+@pytest.mark.parametrize("module", ["tools/policy.py", "data/columnar.py", "utils/export_crypto.py"])
+def test_key_covers_pipeline_modules(tmp_path, monkeypatch, module):
+    root = tmp_path / "root"
+    for path in snapshot._ROOT.glob("*/*.py"):
+        target = root / path.relative_to(snapshot._ROOT)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(path.read_bytes())
+    monkeypatch.setattr(snapshot, "_ROOT", root)
+    before = snapshot_key(options="x")
+
+    with (root / module).open("a") as fh:
+        fh.write("\n# edited\n")
+
+    assert snapshot_key(options="x") != before
+
+
+def test_store_round_trip(tmp_path):
+    pytest.importorskip("cryptography")
+    entries = [BitwardenEntry.from_dict(login_item("a", "u", "p", ["https://a.example"]))]
+    store = SnapshotStore(tmp_path, "secret")
+    store.save("k", {"entries": entries, "metadata": [("items", None)], "other_items": []})
+
+    state = store.load("k")
+
+    assert [entry.to_dict() for entry in state["entries"]] == [entry.to_dict() for entry in entries]
+    assert SnapshotStore(tmp_path, "wrong").load("k") is None
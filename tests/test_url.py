@@ -0,0 +1,46 @@
+import re
+
+import pytest
+
+from utils import url
+
+LONG_PATH = "/" + "segment/" * 20
+
+URIS = [
+    "https://example.com",
+    "https://Example.COM/Login?next=/home#top",
+    "HTTP://www.example.com:80/a/b",
+    "https://www.example.com:443/",
+    "https://example.com:8443/x?y",
+    "https://www.example.com",
+    "https://www./",
+    "www.example.com/path",
+    "example.com",
+    "example.com:443/login?x=1",
+    "https://user@example.com/p",
+    "https://[2001:db8::1]:443/login",
+    "http://[::1]/",
+    "https://example.com/path;params?q=1",
+    "https://example.com/a;b/c",
+    "androidapp://com.example.app",
+    "ftp://files.example.com/pub?x#y",
+    "https://example.com" + LONG_PATH,
+    "https://example.com" + LONG_PATH + "?q=1",
+    "https://www.example.com:443" + LONG_PATH[:100],
+    "https://exämple.com/ü",
+    "https://example.com/a b",
+    "https://",
+    "",
+]
+
+
+def _split(uri: str) -> tuple[str, str]:
+    return url.normalise_domain.__wrapped__(uri), url.shorten_uri.__wrapped__(uri)
+
+
+@pytest.mark.parametrize("uri", URIS)
+def test_fast_path_matches_urlparse(uri, monkeypatch):
+    fast = _split(uri)
+    monkeypatch.setattr(url, "_PLAIN_URL", re.compile(r"(?!)"))  # force every URI through urlparse
+
+    assert fast == _split(uri)
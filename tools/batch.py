@@ -0,0 +1,169 @@
+"""Batch mode: clean many vaults in one invocation (``main.py --batch``).
+
+The batch manifest is a JSON file listing the vaults; relative paths are
+resolved against the manifest's directory::
+
+    {
+      "policy": "team-policy.json",
+      "vaults": [
+        {"name": "alice", "export": "alice.json", "chrome_csv": "alice.csv", "output": "out/alice.json"},
+        {"name": "bob", "export": "bob.json", "output": "out/bob.json", "cache": "caches/bob.db"}
+      ]
+    }
+
+Every vault runs load → dedup → CSV merge → common credentials → save in a
+worker process with its own wrapper state, metrics and merge cache (by
+default ``<output>.cache.json``). Shared‑credential groups are decided by the
+vault's (or the manifest's) policy and cached decisions; nothing is prompted,
+undecided groups are left for the next interactive run.
+"""
+import itertools
+import json
+import logging
+import os
+import sys
+import time
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from utils.logger import logger
+
+
+@dataclass
+class VaultJob:
+    """One vault of a batch manifest."""
+
+    name: str
+    export: Path
+    output: Path
+    cache: Path
+    chrome_csv: Optional[Path] = None
+    csv_profile: Optional[str] = None
+    policy: Optional[Path] = None
+    compact: bool = False
+
+    @classmethod
+    def from_dict(cls, data: dict, base: Path, defaults: dict) -> "VaultJob":
+        def path(key: str) -> Optional[Path]:
+            value = data.get(key, defaults.get(key))
+            return base / value if value else None
+
+        if "export" not in data or "output" not in data:
+            raise ValueError(f"batch vault {data.get('name', data)!r} needs 'export' and 'output'")
+        output = path("output")
+        return cls(
+            name=data.get("name", Path(data["export"]).stem),
+            export=path("export"),
+            output=output,
+            cache=path("cache") or output.with_name(output.stem + ".cache.json"),
+            chrome_csv=path("chrome_csv"),
+            csv_profile=data.get("csv_profile", defaults.get("csv_profile")),
+            policy=path("policy"),
+            compact=data.get("compact", defaults.get("compact", False)),
+        )
+
+
+def load_batch(path: Path) -> list[VaultJob]:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+        defaults = {key: value for key, value in data.items() if key != "vaults"}
+        jobs = [VaultJob.from_dict(vault, path.parent, defaults) for vault in data["vaults"]]
+    except (OSError, json.JSONDecodeError, KeyError, TypeError, ValueError) as exc:
+        sys.exit(f"[!] Failed to read batch manifest {path}: {exc}")
+    names = [job.name for job in jobs]
+    if len(set(names)) != len(names):
+        sys.exit(f"[!] Batch manifest {path} has duplicate vault names")
+    # vaults run in parallel, so no two outputs or caches may be the same file
+    written = Counter(target.resolve() for job in jobs for target in (job.output, job.cache))
+    shared = [str(target) for target, count in written.items() if count > 1]
+    if shared:
+        sys.exit(f"[!] Batch manifest {path} writes {', '.join(shared)} more than once")
+    return jobs
+
+
+def run_vault(job: VaultJob) -> dict:
+    """Run the whole pipeline for *job* and return its summary (never raises)."""
+    # imported here so the parent process does not pay for them
+    from tools.common_credentials import handle_common_credentials
+    from tools.deduplication import deduplicate_items
+    from tools.policy import Policy
+    from utils.cache import cache
+    from utils.metrics import metrics
+    from wrapper.bitwarden import BitwardenWrapper
+    from wrapper.chrome import iter_csv_items
+
+    metrics.reset()
+    logging.disable(logging.INFO)
+    start = time.perf_counter()
+    summary = {"name": job.name, "export": str(job.export), "output": str(job.output)}
+    try:
+        policy = Policy.load(job.policy) if job.policy else None
+        for directory in {job.output.parent, job.cache.parent}:
+            directory.mkdir(parents=True, exist_ok=True)
+        # pool processes are reused: start every vault from a clean slate
+        cache.configure(job.cache)
+        bitwarden = BitwardenWrapper()
+        with metrics.timer("load"):
+            entries = bitwarden.load(job.export)
+        summary["logins_in"] = len(entries)
+        with metrics.timer("dedup"):
+            items = deduplicate_items(entries)
+        if job.chrome_csv:
+            with metrics.timer("chrome_merge"):
+                items = deduplicate_items(itertools.chain(items, iter_csv_items(job.chrome_csv, profile=job.csv_profile)))
+        with metrics.timer("common_credentials"):
+            items = handle_common_credentials(items, policy=policy, interactive=False)
+        with metrics.timer("save"):
+            bitwarden.save(job.output, items, compact=job.compact)
+        summary.update(status="ok", logins_out=len(items))
+    except (Exception, SystemExit) as exc:  # the wrappers exit on unreadable input
+        summary.update(status="failed", error=str(exc))
+    finally:
+        logging.disable(logging.NOTSET)
+    summary["wall_s"] = round(time.perf_counter() - start, 3)
+    summary.update(metrics.to_dict())
+    return summary
+
+
+def run_batch(path: Path, workers: int = 1) -> dict:
+    """Clean every vault of the batch manifest at *path*, *workers* at a time.
+
+    Returns the combined summary: one entry per vault (in manifest order)
+    plus totals.
+    """
+    jobs = load_batch(path)
+    workers = min(workers or os.cpu_count() or 1, len(jobs)) or 1
+    logger.info(f"Batch: {len(jobs)} vaults from {path}, {workers} at a time")
+    start = time.perf_counter()
+    if workers == 1:
+        results = [run_vault(job) for job in jobs]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(run_vault, jobs))
+
+    for result in results:
+        if result["status"] == "ok":
+            logger.info(
+                f"{result['name']}: {result['logins_in']} → {result['logins_out']} logins in {result['wall_s']:.2f}s "
+                f"({result['counters'].get('merges', 0)} merges) → {result['output']}"
+            )
+        else:
+            logger.error(f"{result['name']}: failed – {result['error']}")
+    failed = sum(1 for result in results if result["status"] != "ok")
+    totals = {
+        "vaults": len(results),
+        "failed": failed,
+        "logins_in": sum(result.get("logins_in", 0) for result in results),
+        "logins_out": sum(result.get("logins_out", 0) for result in results),
+        "merges": sum(result["counters"].get("merges", 0) for result in results),
+        "wall_s": round(time.perf_counter() - start, 3),
+    }
+    logger.info(
+        f"Batch done: {totals['vaults'] - failed}/{totals['vaults']} vaults cleaned, "
+        f"{totals['logins_in']} → {totals['logins_out']} logins in {totals['wall_s']:.2f}s"
+    )
+    return {"vaults": results, "totals": totals}
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""Offline breached / reused password audit.
+
+Passwords are checked against a local corpus of breached‑password hashes: a
+sorted file of fixed‑width binary SHA‑1 digests behind a small header. The
+corpus is memory‑mapped and binary‑searched, so even multi‑GB corpora need no
+parsing and almost no resident memory, and nothing is sent over the network.
+
+Build a corpus from a plaintext hash list (one hex digest per line, optionally
+followed by ``:count`` as in the Have I Been Pwned downloads)::
+
+    python -m tools.breach_audit hibp-sha1.txt breached.bin
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import heapq
+import mmap
+import os
+import tempfile
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from data.bitwarden import BitwardenEntry
+from utils.logger import logger
+from utils.metrics import metrics
+
+_MAGIC = b"BWHC"
+_VERSION = 1
+ALGORITHM = "sha1"
+DIGEST_SIZE = hashlib.new(ALGORITHM).digest_size
+# magic (4), version, digest size, algorithm name padded to 10 bytes
+_HEADER_SIZE = 16
+# field added to flagged entries when tagging is enabled
+AUDIT_FIELD = "bw-cleanup-audit"
+
+
+def _header() -> bytes:
+    return _MAGIC + bytes([_VERSION, DIGEST_SIZE]) + ALGORITHM.encode().ljust(10, b"\0")
+
+
+class BreachCorpus:
+    """Memory‑mapped, sorted fixed‑width digest corpus."""
+
+    def __init__(self, path: Path):
+        self._fh = path.open("rb")
+        size = os.fstat(self._fh.fileno()).st_size
+        self._map = mmap.mmap(self._fh.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        if self._map[:_HEADER_SIZE] != _header():
+            raise ValueError(f"{path} is not a {ALGORITHM} breach corpus (build one with `python -m tools.breach_audit`)")
+        self.count = (size - _HEADER_SIZE) // DIGEST_SIZE
+
+    def close(self) -> None:
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        self._fh.close()
+
+    def _record(self, idx: int) -> bytes:
+        offset = _HEADER_SIZE + idx * DIGEST_SIZE
+        return self._map[offset:offset + DIGEST_SIZE]
+
+    def contains_many(self, digests: Iterable[bytes]) -> set[bytes]:
+        """Return the subset of *digests* present in the corpus.
+
+        Queries are sorted first, so each binary search starts where the
+        previous one ended and the mapped pages are touched in file order.
+        """
+        found: set[bytes] = set()
+        lo = 0
+        for digest in sorted(set(digests)):
+            hi = self.count
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if self._record(mid) < digest:
+                    lo = mid + 1
+                else:
+                    hi = mid
+            if lo < self.count and self._record(lo) == digest:
+                found.add(digest)
+        return found
+
+
+def _iter_hex_digests(path: Path) -> Iterator[bytes]:
+    with path.open("r", encoding="ascii", errors="replace") as fh:
+        for line in fh:
+            hex_digest = line.split(":", 1)[0].strip()
+            if len(hex_digest) != DIGEST_SIZE * 2:
+                continue
+            try:
+                yield bytes.fromhex(hex_digest)
+            except ValueError:
+                continue
+
+
+def _read_run(path: Path) -> Iterator[bytes]:
+    with path.open("rb") as fh:
+        while record := fh.read(DIGEST_SIZE):
+            yield record
+
+
+def build_corpus(hash_list: Path, corpus: Path, run_size: int = 1 << 23) -> int:
+    """Build a corpus from a plaintext hex digest list; returns the record count.
+
+    The list is sorted externally in runs of *run_size* digests, so inputs far
+    larger than memory are fine. Duplicates are dropped.
+    """
+    with tempfile.TemporaryDirectory(prefix="bw-corpus-") as tmp:
+        runs: list[Path] = []
+        batch: list[bytes] = []
+
+        def flush() -> None:
+            run = Path(tmp) / f"run{len(runs)}"
+            run.write_bytes(b"".join(sorted(batch)))
+            runs.append(run)
+            batch.clear()
+
+        for digest in _iter_hex_digests(hash_list):
+            batch.append(digest)
+            if len(batch) >= run_size:
+                flush()
+        if batch or not runs:
+            flush()
+
+        count = 0
+        previous = None
+        with corpus.open("wb") as out:
+            out.write(_header())
+            for digest in heapq.merge(*(_read_run(run) for run in runs)):
+                if digest != previous:
+                    out.write(digest)
+                    count += 1
+                    previous = digest
+    logger.info(f"Wrote breach corpus with {count} hashes to {corpus}")
+    return count
+
+
+@dataclass
+class AuditReport:
+    breached: list[dict] = field(default_factory=list)
+    reused: list[dict] = field(default_factory=list)
+
+    def to_dict(self) -> dict:
+        return {"breached": self.breached, "reused": self.reused}
+
+
+def _describe(item: BitwardenEntry) -> dict:
+    # never include the password itself in the report
+    return {"id": item.id, "name": item.name, "username": item.login.username}
+
+
+def _tag(item: BitwardenEntry, value: str) -> None:
+    extras = item.extras if item.extras is not None else {}
+    fields = [f for f in extras.get("fields") or [] if f.get("name") != AUDIT_FIELD]
+    fields.append({"name": AUDIT_FIELD, "value": value, "type": 0, "linkedId": None})
+    extras["fields"] = fields
+    item.extras = extras
+
+
+def audit_passwords(items: list[BitwardenEntry], corpus: BreachCorpus | None, tag: bool = False) -> AuditReport:
+    """Flag logins whose password is breached or used by more than one entry.
+
+    Every distinct password is hashed and looked up once.
+    """
+    by_password: dict[str, list[BitwardenEntry]] = {}
+    for item in items:
+        if item.type == 1 and item.login.password:
+            by_password.setdefault(item.login.password, []).append(item)
+
+    digests = {password: hashlib.new(ALGORITHM, password.encode()).digest() for password in by_password}
+    breached = corpus.contains_many(digests.values()) if corpus is not None else set()
+
+    report = AuditReport()
+    for password, group in by_password.items():
+        is_breached = digests[password] in breached
+        if is_breached:
+            report.breached.extend(_describe(item) for item in group)
+        if len(group) > 1:
+            report.reused.append({"count": len(group), "entries": [_describe(item) for item in group]})
+        if tag:
+            labels = (["breached"] if is_breached else []) + ([f"reused x{len(group)}"] if len(group) > 1 else [])
+            for item in group:
+                if labels:
+                    _tag(item, ", ".join(labels))
+
+    metrics.incr("audit_unique_passwords", len(by_password))
+    metrics.incr("audit_breached_entries", len(report.breached))
+    logger.info(
+        f"Password audit: {len(by_password)} distinct passwords, {len(report.breached)} entries with a breached "
+        f"password, {len(report.reused)} passwords reused across entries"
+    )
+    return report
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Build an offline breached-password corpus from a hex hash list.")
+    parser.add_argument("hash_list", type=Path, help=f"Text file with one {ALGORITHM} hex digest per line")
+    parser.add_argument("corpus", type=Path, help="Output corpus file")
+    args = parser.parse_args(argv)
+    build_corpus(args.hash_list, args.corpus)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
@@ -1,9 +1,11 @@
 from data.bitwarden import BitwardenEntry
+from data.columnar import LoginStore
+from data.internal import ItemIndex
+from tools.policy import Policy
+from utils.manifest import Manifest
 from utils.cache import cache
 from utils.url import normalise_domain
-from utils.logger import logger, CONSOLE
-from rich.prompt import Prompt, Confirm
-from rich.table import Table
+from utils.logger import logger, get_console
 
 
 def _extract_domains(item: BitwardenEntry) -> list[str]:
@@ -12,6 +14,8 @@ def _extract_domains(item: BitwardenEntry) -> list[str]:
 
 
 def _show_group_table(group: list[BitwardenEntry]) -> None:
+    from rich.table import Table
+
     tbl = Table(title="Shared credentials", header_style="bold magenta")
     tbl.add_column("Idx", justify="right")
     tbl.add_column("ID", no_wrap=True)
@@ -19,48 +23,98 @@ def _show_group_table(group: list[BitwardenEntry]) -> None:
     tbl.add_column("Domains")
     for idx, item in enumerate(group):
         tbl.add_row(str(idx), item.id, item.name, ", ".join(sorted(_extract_domains(item))) or "<no uri>")
-    CONSOLE.print(tbl)
+    get_console().print(tbl)
+
+
+def _merge_into(target: BitwardenEntry, sources: list[BitwardenEntry], index: ItemIndex) -> None:
+    for item in sources:
+        cache.add(item, target)
+        index.remove(item)
+    target.merge_many(sources)
+
+
+def _decide_group(group: list[BitwardenEntry], index: ItemIndex, policy: Policy | None, interactive: bool = True) -> bool:
+    """Decide *group* by policy or by asking; False if it was left undecided."""
+    # members merged away by a replayed decision are no longer candidates
+    live = [item for item in group if not index.is_removed(item)]
+    rule = policy.rule_for(group) if policy else None
+    if rule is not None:
+        merges = rule.plan(live)
+        for target, sources in merges:
+            _merge_into(target, sources, index)
+            logger.info("Policy rule '%s': merged %d entries into %s (%s)", rule.name, len(sources), target.name, target.id)
+        if not merges:
+            logger.info("Policy rule '%s': group left unchanged", rule.name)
+        return True
+    if not interactive:
+        logger.info("No policy rule covers this group, left for review")
+        return False
 
+    # only interactive runs get here, so rich is imported on demand
+    from rich.prompt import Confirm, Prompt
 
-def handle_common_credentials(items: list[BitwardenEntry]):
-    credential_groups: dict[tuple[str, str], list[BitwardenEntry]] = {}
+    _show_group_table(live)
+    if not Confirm.ask("Merge this group?", default=False):
+        return True
+    tgt_idx = int(Prompt.ask("Choose target idx", choices=[str(i) for i in range(len(live))]))
+    target = live[tgt_idx]
+    _merge_into(target, [
+        item for idx, item in enumerate(live)
+        if item is not target and Confirm.ask(f"Merge idx {idx} into target?", default=True)
+    ], index)
+    logger.info("Group complete – target now has %d URIs", len(target.login.uris))
+    return True
+
+
+def handle_common_credentials(
+    items: list[BitwardenEntry],
+    policy: Policy | None = None,
+    manifest: Manifest | None = None,
+    store: LoginStore | None = None,
+    decide: bool = True,
+    interactive: bool = True,
+):
+    """Merge entries that share the same username/password.
+
+    Cached decisions are replayed first. Groups covered by a rule of *policy*
+    are then decided automatically; only the remaining groups are prompted.
+    With a *manifest* (incremental mode), groups already decided in the
+    previous run whose members did not change are not revisited. With a
+    columnar *store*, entries are grouped by its integer string codes. With
+    *decide* false only cached decisions are replayed; with *interactive*
+    false groups no rule covers are left undecided instead of prompted (used
+    by ``--plan`` and ``--batch``).
+    """
+    index = ItemIndex(items)
+    credential_groups: dict[tuple, list[BitwardenEntry]] = {}
     # in the first pass, group items by username/password
     for item in items:
         if item.type != 1:
             continue
 
-        key = (item.login.username, item.login.password)
+        key = store.credential_codes(item.login) if store is not None else (item.login.username, item.login.password)
         if key not in credential_groups:
             credential_groups[key] = []
         credential_groups[key].append(item)
 
     # in the second pass, show groups with more than one item
-    for (username, password), group in credential_groups.items():
+    for group in credential_groups.values():
         if len(group) <= 1:
             continue
 
-        logger.info("[bold cyan]Credentials:[/bold cyan] '%s' / '%s' used in %d entries", username, password, len(group))
+        login = group[0].login
+        logger.info("[bold cyan]Credentials:[/bold cyan] '%s' / '%s' used in %d entries", login.username, login.password, len(group))
 
         # check the merge cache to replay previous merges
-        replayed = [False] * len(group)
-        for idx, item in enumerate(group):
-            if cache.replay(item, items):
-                replayed[idx] = True
-        if sum(replayed) >= len(group) - 1:
+        if cache.replay(group, index) >= len(group) - 1:
             logger.info("All items in this group have been merged before")
+        elif manifest is not None and manifest.is_reviewed(group):
+            logger.info("Group unchanged since the last run")
+        elif not decide:
+            logger.info("Group left for review")
             continue
-
-        _show_group_table(group)
-        if not Confirm.ask("Merge this group?", default=False):
+        elif not _decide_group(group, index, policy, interactive):
             continue
-        tgt_idx = int(Prompt.ask("Choose target idx", choices=[str(i) for i in range(len(group))]))
-        target = group[tgt_idx]
-        for idx, item in enumerate(group):
-            if item is target:
-                continue
-            if Confirm.ask(f"Merge idx {idx} into target?", default=True):
-                cache.add(item, target)
-                target.merge(item)
-                items.remove(item)
-        logger.info("Group complete – target now has %d URIs", len(target.login.uris))
-    return items
\ No newline at end of file
+        if manifest is not None:
+            manifest.mark_reviewed(group)
+    return index.compact()
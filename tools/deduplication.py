@@ -1,8 +1,11 @@
-from typing import Generator, Any
+from typing import Callable, Generator, Any, Iterable
 
 from data.bitwarden import BitwardenEntry
+from data.columnar import LoginStore
 from utils.logger import logger
-from utils.url import normalise_domain, shorten_uri
+from utils.manifest import Manifest
+from utils.metrics import metrics
+from utils.url import normalise_domain
 
 
 def iter_login_keys(item: BitwardenEntry) -> Generator[tuple[str, str, str], Any, None]:
@@ -13,36 +16,123 @@ def iter_login_keys(item: BitwardenEntry) -> Generator[tuple[str, str, str], Any
             yield normalise_domain(uri_entry.uri), login.username, login.password
 
 
-def deduplicate_items(items: list[BitwardenEntry]) -> list[BitwardenEntry]:
-    """Merge duplicates inside a Bitwarden *items* list (dict‑based)."""
-    seen: dict[tuple[str, str, str], BitwardenEntry] = {}
-    result: list[BitwardenEntry] = []
+class _DisjointSet:
+    """Union‑find over item indices; the root of a set is always its smallest index."""
 
-    for item in items:
-        login = item.type == 1
-        if not login:  # secure notes / cards etc – keep as‑is
-            result.append(item)
+    def __init__(self, size: int):
+        self.parent = list(range(size))
+
+    def find(self, idx: int) -> int:
+        parent = self.parent
+        while parent[idx] != idx:
+            parent[idx] = parent[parent[idx]]  # path halving
+            idx = parent[idx]
+        return idx
+
+    def union(self, a: int, b: int) -> None:
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a < root_b:
+            self.parent[root_b] = root_a
+        elif root_b < root_a:
+            self.parent[root_a] = root_b
+
+
+def _seed_known_clusters(items: list[BitwardenEntry], manifest: Manifest, clusters: _DisjointSet) -> list[int]:
+    """Join unchanged items by their cluster of the previous run; return the indices that still need keys.
+
+    An unchanged item's keys only matter if a new or changed item has the same
+    credentials (unchanged items of different clusters never shared a key), so
+    only those unchanged items are keyed again.
+    """
+    first: dict[int, int] = {}
+    known: list[int] = []
+    pending: list[int] = []
+    for idx, item in enumerate(items):
+        if item.type != 1:
             continue
+        cluster = manifest.previous_cluster(item)
+        if cluster is None:
+            pending.append(idx)
+        else:
+            clusters.union(first.setdefault(cluster, idx), idx)
+            known.append(idx)
+    credentials = {(items[idx].login.username, items[idx].login.password) for idx in pending}
+    linked = [idx for idx in known if (items[idx].login.username, items[idx].login.password) in credentials]
+    logger.info(f"Reused {len(first)} clusters of the last run, keying {len(pending)} changed and {len(linked)} linked items")
+    return linked + pending
+
 
-        # Remember whether we've merged this item into an existing one
-        merged_into_existing = False
-        for key in iter_login_keys(item):
-            if key in seen:
-                # Duplicate: merge extra URIs into the original item
-                seen[key].merge(item)
-                merged_into_existing = True
-                break
+def deduplicate_items(
+    items: Iterable[BitwardenEntry],
+    domains: Callable[[BitwardenEntry], list[str]] | None = None,
+    manifest: Manifest | None = None,
+    store: LoginStore | None = None,
+) -> list[BitwardenEntry]:
+    """Merge duplicates inside a Bitwarden *items* list (dict‑based).
 
-        if merged_into_existing:
+    Two login items are duplicates if they share any (domain, username,
+    password) key; duplicates are closed transitively, so an item whose URIs
+    bridge two others pulls all three into one cluster. Every cluster is merged
+    into its first item (in input order), keeping the output deterministic.
+    *items* may be any iterable, e.g. a lazy CSV import stream; it is read into
+    a list first, since clusters are only known after every key. *domains* can
+    supply the key domains per item (see `near_duplicate_domains`). With a
+    refreshed *manifest* (incremental mode), unchanged clusters of the last
+    run are joined without keying their members, and the resulting clusters
+    are recorded for the next run.
+    With a columnar *store*, keys are tuples of its integer string codes.
+    """
+    items = list(items)
+    clusters = _DisjointSet(len(items))
+    owners: dict[tuple, int] = {}
+    keys_generated = 0
+    pending = _seed_known_clusters(items, manifest, clusters) if manifest is not None else range(len(items))
+    for idx in pending:
+        item = items[idx]
+        if item.type != 1:
+            continue
+        if store is not None:
+            username, password = store.credential_codes(item.login)
+            codes = store.domain_codes(item.login) if domains is None else map(store.pool.encode, domains(item))
+            keys = ((domain, username, password) for domain in codes)
+        elif domains is None:
+            keys = iter_login_keys(item)
+        else:
+            keys = ((domain, item.login.username, item.login.password) for domain in domains(item))
+        for key in keys:
+            keys_generated += 1
+            owner = owners.setdefault(key, idx)
+            if owner != idx:
+                clusters.union(owner, idx)
+
+    members: dict[int, list[int]] = {}
+    for idx, item in enumerate(items):
+        if item.type == 1:
+            members.setdefault(clusters.find(idx), []).append(idx)
+
+    if manifest is not None:
+        manifest.record_clusters((items[member], root) for root, group in members.items() for member in group)
+
+    result: list[BitwardenEntry] = []
+    for idx, item in enumerate(items):
+        if item.type != 1:  # secure notes / cards etc – keep as‑is
+            result.append(item)
+            continue
+        if idx not in members:  # merged into an earlier item
             continue
 
-        # Not a duplicate: normalize its URIs, add to results and mark seen
-        for uri_obj in item.login.uris:
-            uri_obj.uri = shorten_uri(uri_obj.uri)
+        # Cluster root: normalize its URIs, then merge every duplicate into it
+        item.shorten_uris()
+        item.merge_many(items[member] for member in members[idx][1:])
         result.append(item)
-        for key in iter_login_keys(item):
-            seen[key] = item
 
-    logger.info(f"Found {len(seen)} unique items in {len(items)} total items")
+    metrics.incr("keys_generated", keys_generated)
+    sizes = [len(group) for group in members.values()]
+    duplicate_clusters = sum(1 for size in sizes if size > 1)
+    logger.info(f"Found {len(owners)} unique keys in {len(items)} total items")
+    logger.info(
+        f"Merged {sum(sizes) - len(sizes)} duplicates in {duplicate_clusters} clusters "
+        f"(largest cluster: {max(sizes, default=0)} items), {len(result)} items remain"
+    )
 
-    return result
\ No newline at end of file
+    return result
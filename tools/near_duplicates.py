@@ -0,0 +1,38 @@
+from typing import Iterable
+
+from data.bitwarden import BitwardenEntry
+from tools.deduplication import deduplicate_items
+from utils.logger import logger
+from utils.public_suffix import registrable_domains
+from utils.url import normalise_domain
+
+
+# schemes whose host is a DNS name; URIs without a scheme are treated as https
+WEB_SCHEMES = frozenset({"http", "https"})
+
+
+def _is_web_uri(uri: str) -> bool:
+    scheme, separator, _ = uri.partition("://")
+    return not separator or scheme.lower() in WEB_SCHEMES
+
+
+def near_duplicate_domains(item: BitwardenEntry) -> list[str]:
+    """Registrable domains (eTLD+1) of the web URIs of *item*.
+
+    Other URIs, e.g. ``androidapp://com.example.app`` (a reversed package
+    name, not a host), keep their normalised domain like in the exact dedup.
+    """
+    uris = [u.uri for u in item.login.uris if u.uri]
+    web = registrable_domains(normalise_domain(uri) for uri in uris if _is_web_uri(uri))
+    return web + list(dict.fromkeys(normalise_domain(uri) for uri in uris if not _is_web_uri(uri)))
+
+
+def merge_near_duplicates(items: Iterable[BitwardenEntry]) -> list[BitwardenEntry]:
+    """Merge logins that share username/password on the same registrable domain.
+
+    Runs the regular dedup engine with (registrable domain, username,
+    password) keys, so ``login.example.com`` and ``accounts.example.com``
+    entries with identical credentials collapse into one, in linear time.
+    """
+    logger.info("Merging near-duplicates by registrable domain")
+    return deduplicate_items(items, domains=near_duplicate_domains)
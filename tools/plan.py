@@ -0,0 +1,123 @@
+"""Dry‑run change plans (``--plan`` / ``--apply-plan``).
+
+A plan is a JSON Lines file with one change per line, in the order the
+pipeline made them:
+
+* ``{"op": "rewrite", "id", "fingerprint", "uris"}`` – the entry's URIs were
+  normalised in place; ``uris`` is the new list.
+* ``{"op": "merge", <MergeOperation fields>, "uris_added"}`` – the source was
+  merged into (and removed in favour of) the target; ``uris_added`` are the
+  URIs it contributed.
+* ``{"op": "add", "item"}`` – an entry of the result that is not part of the
+  export, e.g. one imported from the Chrome CSV.
+
+Applying a plan to the export it was made from gives the same output as the
+run that recorded it, without repeating the analysis.
+"""
+import json
+import sys
+from collections import Counter
+from pathlib import Path
+
+from data import bitwarden
+from data.bitwarden import BitwardenEntry, UriEntry
+from data.internal import ItemIndex, MergeOperation
+from utils.logger import logger
+from utils.metrics import metrics
+
+
+class PlanWriter:
+    """Streams every change made to entries while it is open into a plan file."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.counts: Counter = Counter()
+        self._fh = path.open("w", encoding="utf-8")
+        bitwarden.change_observers.append(self)
+
+    def _write(self, record: dict) -> None:
+        self._fh.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.counts[record["op"]] += 1
+
+    def rewritten(self, entry: BitwardenEntry) -> None:
+        self._write({
+            "op": "rewrite",
+            "id": entry.id,
+            "fingerprint": entry.get_fingerprint(),
+            "uris": [u.to_dict() for u in entry.login.uris],
+        })
+
+    def merged(self, source: BitwardenEntry, target: BitwardenEntry, uris_added: list[UriEntry]) -> None:
+        self._write({
+            "op": "merge",
+            **MergeOperation.create(source, target).to_dict(),
+            "uris_added": [u.to_dict() for u in uris_added],
+        })
+
+    def close(self, items: list[BitwardenEntry], inputs: list[BitwardenEntry]) -> None:
+        """Record the entries of *items* not loaded from the export (*inputs*) and close the plan."""
+        bitwarden.change_observers.remove(self)
+        loaded = {id(entry) for entry in inputs}
+        for item in items:
+            if id(item) not in loaded:
+                self._write({"op": "add", "item": item.to_dict()})
+        self._fh.close()
+        logger.info(
+            f"Wrote plan to {self.path}: {self.counts['merge']} merges, {self.counts['rewrite']} URI rewrites, "
+            f"{self.counts['add']} new entries"
+        )
+
+
+def _find_source(index: ItemIndex, operation: MergeOperation, target: BitwardenEntry | None) -> BitwardenEntry | None:
+    # ids are not unique (exact duplicates share one), so never pick the target itself
+    for candidate in index.by_id.get(operation.source_id, ()):
+        if candidate is not target and candidate.get_fingerprint() == operation.source_fingerprint:
+            return candidate
+    return None
+
+
+def apply_plan(path: Path, items: list[BitwardenEntry]) -> list[BitwardenEntry]:
+    """Apply the plan at *path* to the login *items* of an export, streaming it line by line.
+
+    Steps that refer to entries missing from *items* (e.g. merges into an
+    entry imported from a CSV, which comes with its own ``add`` step) are skipped.
+    """
+    index = ItemIndex(items)
+    added: list[BitwardenEntry] = []
+    applied = skipped = 0
+    try:
+        with path.open(encoding="utf-8") as fh:
+            for line_no, line in enumerate(fh, 1):
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                op = record.get("op")
+                found = True
+                if op == "rewrite":
+                    entry = index.find(record["id"], record["fingerprint"])
+                    if entry is not None:
+                        entry.login.uris = [UriEntry.from_dict(u) for u in record["uris"]]
+                    found = entry is not None
+                elif op == "merge":
+                    operation = MergeOperation.from_dict(record)
+                    target = index.find(operation.target_id, operation.target_fingerprint)
+                    if target is not None:
+                        target.login.uris.extend(UriEntry.from_dict(u) for u in record["uris_added"])
+                    source = _find_source(index, operation, target)
+                    if source is not None:
+                        index.remove(source)
+                    found = target is not None or source is not None
+                elif op == "add":
+                    added.append(BitwardenEntry.from_dict(record["item"]))
+                else:
+                    raise ValueError(f"line {line_no}: unknown plan operation {op!r}")
+                if found:
+                    applied += 1
+                else:
+                    skipped += 1
+    except (OSError, ValueError, KeyError) as exc:
+        sys.exit(f"[!] Failed to apply plan {path}: {exc}")
+
+    metrics.incr("plan_steps_applied", applied)
+    logger.info(f"Applied {applied} plan steps from {path} ({skipped} referred to entries not in the export)")
+    return index.compact() + added
@@ -0,0 +1,141 @@
+import json
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Optional
+
+from data.bitwarden import BitwardenEntry
+from utils.url import normalise_domain
+
+# Target preferences; each maps an entry to a sort key where larger wins.
+PREFERENCES: dict[str, Callable[[BitwardenEntry], object]] = {
+    "favorite": lambda item: item.favorite,
+    "newest": lambda item: item.revisionDate.timestamp() if item.revisionDate else float("-inf"),
+    "oldest": lambda item: -item.revisionDate.timestamp() if item.revisionDate else float("-inf"),
+    "most_uris": lambda item: len(item.login.uris),
+}
+
+ACTIONS = {"merge", "skip"}
+
+# Entry attributes usable in `never_merge_across`, mapped to a hashable partition key.
+BOUNDARIES: dict[str, Callable[[BitwardenEntry], object]] = {
+    "organizationId": lambda item: item.organizationId,
+    "folderId": lambda item: item.folderId,
+    "collectionIds": lambda item: frozenset(item.collectionIds or ()),
+    "type": lambda item: item.type,
+    "reprompt": lambda item: item.reprompt,
+}
+
+
+@dataclass
+class PolicyRule:
+    """A single rule of a merge policy.
+
+    A rule applies to a shared‑credential group when all of its conditions
+    hold. ``merge`` merges every member into the target picked by *prefer*
+    (ties go to the earliest entry); members whose *never_merge_across*
+    attributes differ are split into separate sub‑groups first. ``skip``
+    leaves the group untouched.
+    """
+
+    name: str
+    action: str = "merge"
+    prefer: list[str] = field(default_factory=list)
+    never_merge_across: list[str] = field(default_factory=list)
+    min_size: int = 2
+    max_size: Optional[int] = None
+    username: Optional[re.Pattern] = None  # must fullmatch the shared username
+    domain: Optional[re.Pattern] = None  # must fullmatch a domain of any member
+
+    def matches(self, group: list[BitwardenEntry]) -> bool:
+        if len(group) < self.min_size:
+            return False
+        if self.max_size is not None and len(group) > self.max_size:
+            return False
+        if self.username is not None and not self.username.fullmatch(group[0].login.username or ""):
+            return False
+        if self.domain is not None and not any(
+            self.domain.fullmatch(normalise_domain(uri_entry.uri))
+            for item in group
+            for uri_entry in item.login.uris
+        ):
+            return False
+        return True
+
+    def choose_target(self, group: list[BitwardenEntry]) -> BitwardenEntry:
+        keys = [PREFERENCES[name] for name in self.prefer]
+        return max(
+            enumerate(group),
+            key=lambda pair: (*(key(pair[1]) for key in keys), -pair[0]),
+        )[1]
+
+    def plan(self, group: list[BitwardenEntry]) -> list[tuple[BitwardenEntry, list[BitwardenEntry]]]:
+        """Return (target, sources) pairs for *group* under this rule."""
+        if self.action == "skip":
+            return []
+        partitions: dict[tuple, list[BitwardenEntry]] = {}
+        for item in group:
+            partition = tuple(BOUNDARIES[attr](item) for attr in self.never_merge_across)
+            partitions.setdefault(partition, []).append(item)
+
+        merges = []
+        for members in partitions.values():
+            if len(members) < 2:
+                continue
+            target = self.choose_target(members)
+            merges.append((target, [item for item in members if item is not target]))
+        return merges
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "PolicyRule":
+        rule = cls(
+            name=data.get("name", "unnamed rule"),
+            action=data.get("action", "merge"),
+            prefer=list(data.get("prefer", [])),
+            never_merge_across=list(data.get("never_merge_across", [])),
+            min_size=data.get("min_size", 2),
+            max_size=data.get("max_size"),
+            username=re.compile(data["username"]) if data.get("username") else None,
+            domain=re.compile(data["domain"]) if data.get("domain") else None,
+        )
+        if rule.action not in ACTIONS:
+            raise ValueError(f"Rule '{rule.name}': unknown action '{rule.action}'")
+        for name in rule.prefer:
+            if name not in PREFERENCES:
+                raise ValueError(f"Rule '{rule.name}': unknown preference '{name}'")
+        for attr in rule.never_merge_across:
+            if attr not in BOUNDARIES:
+                raise ValueError(
+                    f"Rule '{rule.name}': cannot split groups by '{attr}' (use one of {', '.join(BOUNDARIES)})"
+                )
+        return rule
+
+
+@dataclass
+class Policy:
+    """Ordered list of rules; the first matching rule decides a group.
+
+    Policy files are JSON, e.g.::
+
+        {
+          "rules": [
+            {"name": "huge groups", "min_size": 50, "action": "skip"},
+            {"name": "default", "prefer": ["favorite", "newest", "most_uris"],
+             "never_merge_across": ["organizationId"]}
+          ]
+        }
+    """
+
+    rules: list[PolicyRule] = field(default_factory=list)
+
+    def rule_for(self, group: list[BitwardenEntry]) -> Optional[PolicyRule]:
+        """Return the first rule covering *group*, or None to ask the user."""
+        return next((rule for rule in self.rules if rule.matches(group)), None)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Policy":
+        return cls(rules=[PolicyRule.from_dict(rule) for rule in data.get("rules", [])])
+
+    @classmethod
+    def load(cls, path: Path) -> "Policy":
+        return cls.from_dict(json.loads(path.read_text(encoding="utf-8")))
@@ -1,70 +1,350 @@
 import json
+import os
+from pathlib import Path
+from typing import Iterable
 
-from data.bitwarden import BitwardenEntry
-from data.internal import MergeOperation
+from data.bitwarden import BitwardenEntry, FINGERPRINT_KEY_SIZE, FINGERPRINT_VERSION, set_fingerprint_key
+from data.internal import ItemIndex, MergeOperation
 from utils.logger import logger
+from utils.metrics import metrics
 
 CACHE_FILE = "cache.json"
+# compact the journal into the snapshot once it holds this many records and
+# this share of the snapshot's size, so compaction stays amortised O(1) per record
+COMPACT_MIN_RECORDS = 500
+COMPACT_RATIO = 0.5
+
+
+class CacheBackend:
+    """Storage for merge operations used by `Cache`."""
+
+    # records written since the last compaction
+    pending: int = 0
+    # whether the last `load` skipped unreadable records
+    torn: bool = False
+
+    def needs_compaction(self) -> bool:
+        return False
+
+    def close(self) -> None:
+        pass
+
+    def load(self) -> list[MergeOperation]:
+        """Return all stored merge operations, oldest first."""
+        raise NotImplementedError
+
+    def append(self, op: MergeOperation) -> None:
+        """Persist a single merge operation."""
+        raise NotImplementedError
+
+    def compact(self, ops: list[MergeOperation]) -> None:
+        """Replace the stored state with exactly *ops*."""
+        raise NotImplementedError
+
+
+class JournalBackend(CacheBackend):
+    """Snapshot file plus an append‑only JSON Lines journal.
+
+    The snapshot (``cache.json``) keeps the historic format: a JSON list of
+    merge operations. Every new decision is appended to ``cache.json.journal``
+    in O(1). On load, torn or otherwise unreadable journal records are skipped
+    individually instead of discarding the whole cache.
+    """
+
+    def __init__(self, path: str | Path):
+        self.snapshot_path = Path(path)
+        self.journal_path = Path(f"{path}.journal")
+        self.pending = 0
+        self.snapshot_records = 0
+        self._journal = None  # append handle, opened on the first append
+
+    def needs_compaction(self) -> bool:
+        return self.pending >= max(COMPACT_MIN_RECORDS, COMPACT_RATIO * self.snapshot_records)
+
+    def load(self) -> list[MergeOperation]:
+        ops: list[MergeOperation] = []
+        try:
+            ops.extend(MergeOperation.from_dict(item) for item in json.loads(self.snapshot_path.read_text(encoding="utf-8")))
+        except FileNotFoundError:
+            pass
+        except (json.JSONDecodeError, KeyError, TypeError):
+            logger.warning("Cache snapshot is corrupted. Recovering from the journal only.")
+        self.snapshot_records = len(ops)
+
+        self.pending = 0
+        self.torn = False
+        try:
+            with self.journal_path.open(encoding="utf-8") as f:
+                for lineno, line in enumerate(f, 1):
+                    if not line.strip():
+                        continue
+                    try:
+                        ops.append(MergeOperation.from_dict(json.loads(line)))
+                    except (json.JSONDecodeError, KeyError, TypeError):
+                        logger.warning(f"Skipping torn cache journal record on line {lineno}")
+                        self.torn = True
+                        continue
+                    self.pending += 1
+        except FileNotFoundError:
+            pass
+        return ops
+
+    def append(self, op: MergeOperation) -> None:
+        if self._journal is None:
+            self._journal = self.journal_path.open("a+b")
+            if self._journal.tell():
+                # never continue a torn last line: the record would be lost with it
+                self._journal.seek(-1, os.SEEK_END)
+                if self._journal.read(1) != b"\n":
+                    self._journal.write(b"\n")
+        self._journal.write(json.dumps(op.to_dict()).encode("utf-8") + b"\n")
+        self._journal.flush()
+        self.pending += 1
+
+    def close(self) -> None:
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+    def compact(self, ops: list[MergeOperation]) -> None:
+        # write the snapshot atomically first; replaying a stale journal on top
+        # of it after a crash is harmless because records are idempotent
+        tmp_path = self.snapshot_path.with_name(self.snapshot_path.name + ".tmp")
+        with tmp_path.open("w", encoding="utf-8") as f:
+            json.dump([op.to_dict() for op in ops], f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+        self.close()
+        self.journal_path.unlink(missing_ok=True)
+        self.snapshot_records = len(ops)
+        self.pending = 0
+        self.torn = False
+
+
+class SqliteBackend(CacheBackend):
+    """SQLite‑backed storage; every append is its own transaction."""
+
+    def __init__(self, path: str | Path, read_only: bool = False):
+        import sqlite3
+
+        if read_only:
+            # a missing database reads as empty; nothing is ever created
+            self._conn = sqlite3.connect(f"{Path(path).absolute().as_uri()}?mode=ro", uri=True) if Path(path).exists() else None
+            return
+        self._conn = sqlite3.connect(path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS merge_operations ("
+            " source_id TEXT NOT NULL, source_fingerprint TEXT NOT NULL,"
+            " target_id TEXT NOT NULL, target_fingerprint TEXT NOT NULL,"
+            " PRIMARY KEY (source_id, source_fingerprint))"
+        )
+        self._conn.commit()
+
+    def load(self) -> list[MergeOperation]:
+        if self._conn is None:
+            return []
+        rows = self._conn.execute(
+            "SELECT source_id, source_fingerprint, target_id, target_fingerprint FROM merge_operations ORDER BY rowid"
+        )
+        return [
+            MergeOperation(source_id=source_id, source_fingerprint=source_fingerprint, target_id=target_id, target_fingerprint=target_fingerprint)
+            for source_id, source_fingerprint, target_id, target_fingerprint in rows
+        ]
+
+    def append(self, op: MergeOperation) -> None:
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO merge_operations VALUES (?, ?, ?, ?)",
+                (op.source_id, op.source_fingerprint, op.target_id, op.target_fingerprint),
+            )
+
+    def compact(self, ops: list[MergeOperation]) -> None:
+        with self._conn:
+            self._conn.execute("DELETE FROM merge_operations")
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO merge_operations VALUES (?, ?, ?, ?)",
+                [(op.source_id, op.source_fingerprint, op.target_id, op.target_fingerprint) for op in ops],
+            )
+
+
+def load_fingerprint_key(path: str | Path) -> bytes:
+    """Return the fingerprint key kept next to the cache at *path*.
+
+    The key is created (0600) on first use, also for a read‑only cache, so
+    the fingerprints in a ``--plan`` still match when the plan is applied.
+    """
+    key_path = Path(f"{path}.key")
+    try:
+        return key_path.read_bytes()
+    except FileNotFoundError:
+        pass
+    key = os.urandom(FINGERPRINT_KEY_SIZE)
+    try:
+        fd = os.open(key_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        # another run created it first
+        return key_path.read_bytes()
+    with os.fdopen(fd, "wb") as fh:
+        fh.write(key)
+    return key
+
+
+def open_backend(path: str | Path, read_only: bool = False) -> CacheBackend:
+    """Pick the storage backend for *path* (SQLite for .db/.sqlite files)."""
+    if Path(path).suffix in {".db", ".sqlite", ".sqlite3"}:
+        return SqliteBackend(path, read_only=read_only)
+    return JournalBackend(path)
+
 
 class Cache:
+    """Merge decisions of earlier runs.
+
+    Nothing is read until the cache is first used, so runs that never replay
+    or record a decision (and plain imports of this module) skip loading it.
+    `configure` points the cache at another file before that. A read‑only
+    cache (``--plan``) keeps new records in memory and never writes.
+    """
+
     # (source_id, source_fingerprint) -> (target_id, target_fingerprint)
     merge_operations: dict[tuple[str, str], tuple[str, str]] = {}
+    # same shape, for operations recorded with version 1 (MD5) fingerprints;
+    # they are migrated to the current fingerprint once they replay
+    legacy_operations: dict[tuple[str, str], tuple[str, str]] = {}
+
+    def __init__(self, path: str | Path = CACHE_FILE, read_only: bool = False):
+        self.path = path
+        self.read_only = read_only
+        self._backend: CacheBackend | None = None
+
+    def configure(self, path: str | Path, read_only: bool = False) -> None:
+        """Use the cache file at *path*; it is loaded on first use.
 
-    def __init__(self):
-        """Initialize the cache and load existing merge operations."""
+        Fingerprints are keyed with the key stored next to it from now on.
+        """
+        set_fingerprint_key(load_fingerprint_key(path))
+        if self._backend is not None:
+            self._backend.close()
+        self.path = path
+        self.read_only = read_only
+        self._backend = None
+        self.merge_operations = {}
+        self.legacy_operations = {}
+
+    @property
+    def backend(self) -> CacheBackend:
+        """The storage backend, opened and loaded on first access."""
+        return self._backend or self._open()
+
+    def _open(self) -> CacheBackend:
+        self._backend = open_backend(self.path, read_only=self.read_only)
         self.load()
+        return self._backend
 
     def load(self):
-        """Load merge operations from the cache file."""
-        try:
-            with open(CACHE_FILE, "r") as f:
-                merge_operations = [MergeOperation.from_dict(item) for item in json.load(f)]
-                self.merge_operations = {
-                    (op.source_id, op.source_fingerprint): (op.target_id, op.target_fingerprint)
-                    for op in merge_operations
-                }
-        except FileNotFoundError:
-            self.merge_operations = {}
-        except json.JSONDecodeError:
-            logger.warning("Cache file is corrupted. Starting with an empty cache.")
-            self.merge_operations = {}
+        """Load merge operations from the backend."""
+        self.merge_operations = {}
+        self.legacy_operations = {}
+        for op in self.backend.load():
+            self._store(op)
+        if self.legacy_operations:
+            # drop legacy records that were already migrated by an earlier run
+            migrated = {(source_id, target_id) for (source_id, _), (target_id, _) in self.merge_operations.items()}
+            self.legacy_operations = {
+                source: target for source, target in self.legacy_operations.items()
+                if (source[0], target[0]) not in migrated
+            }
+        if (self.backend.pending or self.backend.torn) and not self.read_only:
+            # fold the previous run's journal (and any torn record) into the snapshot
+            self.save()
 
     def save(self):
-        """Save merge operations to the cache file."""
-        with open(CACHE_FILE, "w") as f:
-            merge_operations = [
-                MergeOperation(source_id=source_id, target_id=target_id, source_fingerprint=source_fingerprint, target_fingerprint=target_fingerprint)
-                for (source_id, source_fingerprint), (target_id, target_fingerprint) in self.merge_operations.items()
-            ]
-            json.dump([item.to_dict() for item in merge_operations], f, indent=2)
+        """Compact all merge operations into the backend's snapshot."""
+        merge_operations = [
+            MergeOperation(source_id=source_id, target_id=target_id, source_fingerprint=source_fingerprint, target_fingerprint=target_fingerprint)
+            for operations in (self.merge_operations, self.legacy_operations)
+            for (source_id, source_fingerprint), (target_id, target_fingerprint) in operations.items()
+        ]
+        self.backend.compact(merge_operations)
+
+    def _store(self, op: MergeOperation):
+        if BitwardenEntry.fingerprint_version(op.source_fingerprint) == FINGERPRINT_VERSION:
+            operations = self.merge_operations
+        else:
+            operations = self.legacy_operations
+        operations[(op.source_id, op.source_fingerprint)] = (op.target_id, op.target_fingerprint)
+
+    def _append(self, op: MergeOperation):
+        backend = self.backend
+        self._store(op)
+        if self.read_only:
+            return
+        backend.append(op)
+        if backend.needs_compaction():
+            self.save()
+
+    def _lookup(self, source: BitwardenEntry) -> tuple[str, str] | None:
+        """Return the cached (target_id, target_fingerprint) for *source*, if any."""
+        if self._backend is None:
+            self._open()
+        target = self.merge_operations.get((source.id, source.get_fingerprint()))
+        if target is None and self.legacy_operations:
+            target = self.legacy_operations.get((source.id, source.get_legacy_fingerprint()))
+        return target
 
     def exists(self, source: BitwardenEntry) -> bool:
         """Check if a merge operation exists in the cache."""
-        return (source.id, source.get_fingerprint()) in self.merge_operations
+        return self._lookup(source) is not None
 
     def add(self, source: BitwardenEntry, target: BitwardenEntry):
         """Add a merge operation to the cache."""
-        self.merge_operations[(source.id, source.get_fingerprint())] = (target.id, target.get_fingerprint())
-        logger.debug(f"Added merge operation to cache: {source.id} -> {target.id}")
-        self.save()
+        self._append(MergeOperation.create(source, target))
+        logger.debug("Added merge operation to cache: %s -> %s", source.id, target.id)
 
-    def replay(self, source: BitwardenEntry, items: list[BitwardenEntry]) -> BitwardenEntry | None:
-        """Replay a merge operation from the cache."""
-        if not self.exists(source):
+    def _resolve(self, source: BitwardenEntry, index: ItemIndex) -> BitwardenEntry | None:
+        """Return the live cached target of *source* and tombstone *source* in *index*."""
+        cached = self._lookup(source)
+        if cached is None:
+            metrics.incr("cache_misses")
             return None
 
-        merged = None
-        target_id, target_fingerprint = self.merge_operations[(source.id, source.get_fingerprint())]
-        for item in items:
-            if item.id == target_id and item.get_fingerprint() == target_fingerprint:
-                logger.info(f"Replaying merge operation: {source.id} -> {item.id}")
-                merged = item.merge(source)
-                break
+        target_id, target_fingerprint = cached
+        legacy = BitwardenEntry.fingerprint_version(target_fingerprint) != FINGERPRINT_VERSION
+        target = index.find(target_id, target_fingerprint, legacy=legacy)
+        if target is None or target is source:
+            metrics.incr("cache_misses")
+            return None
 
-        if merged:
-            items.remove(source)
+        logger.info(f"Replaying merge operation: {source.id} -> {target.id}")
+        metrics.incr("cache_hits")
+        if legacy:
+            # journal the migrated record; the legacy one is dropped at the next compaction
+            self.legacy_operations.pop((source.id, source.get_legacy_fingerprint()), None)
+            self._append(MergeOperation.create(source, target))
+        index.remove(source)
+        return target
 
-        return merged
+    def replay(self, sources: Iterable[BitwardenEntry], index: ItemIndex) -> int:
+        """Replay cached merge operations for *sources*; return how many replayed.
 
+        Targets are looked up through *index*, where merged sources are
+        tombstoned, and every target is merged with a single `merge_many` call.
+        A source that is itself a target gets its own sources first, so chained
+        decisions replay as if they were applied one by one.
+        """
+        pending: dict[int, tuple[BitwardenEntry, list[BitwardenEntry]]] = {}
+        replayed = 0
+        for source in sources:
+            target = self._resolve(source, index)
+            if target is None:
+                continue
+            replayed += 1
+            own = pending.pop(id(source), None)
+            if own is not None:
+                source.merge_many(own[1])
+            pending.setdefault(id(target), (target, []))[1].append(source)
+        for target, merged in pending.values():
+            target.merge_many(merged)
+        return replayed
 
 cache = Cache()
\ No newline at end of file
@@ -0,0 +1,149 @@
+"""Bitwarden password‑protected (encrypted) JSON exports.
+
+Such an export is a small envelope around the plaintext export::
+
+    {"encrypted": true, "passwordProtected": true, "salt": "...",
+     "kdfType": 0, "kdfIterations": 600000, "kdfMemory": null, "kdfParallelism": null,
+     "encKeyValidation_DO_NOT_EDIT": "2.<iv>|<ct>|<mac>", "data": "2.<iv>|<ct>|<mac>"}
+
+The key is derived once from the export password (PBKDF2‑SHA256 or Argon2id
+over the salt string) and stretched with HKDF‑Expand into an AES‑256 key and
+an HMAC‑SHA256 key; ``data`` is the whole plaintext export as one type‑2
+EncString (AES‑256‑CBC, HMAC over IV and ciphertext). Nothing decrypted is
+ever written to disk.
+"""
+import base64
+import hashlib
+import hmac
+import os
+import sys
+import uuid
+
+KDF_PBKDF2 = 0
+KDF_ARGON2ID = 1
+DEFAULT_ITERATIONS = 600_000
+_ENC_TYPE = "2"  # AesCbc256_HmacSha256_B64
+_VALIDATION_KEY = "encKeyValidation_DO_NOT_EDIT"
+ENVELOPE_KEYS = (
+    "encrypted", "passwordProtected", "salt", "kdfType", "kdfIterations", "kdfMemory", "kdfParallelism",
+    _VALIDATION_KEY, "data",
+)
+
+
+class WrongPassword(ValueError):
+    pass
+
+
+def _cipher_module():
+    try:
+        from cryptography.hazmat.primitives import padding
+        from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+    except ImportError:
+        sys.exit("[!] Encrypted exports require the 'cryptography' package (pip install cryptography)")
+    return padding, Cipher, algorithms, modes
+
+
+def _hkdf_expand(prk: bytes, info: bytes, length: int = 32) -> bytes:
+    # single-block HKDF-Expand (RFC 5869); Bitwarden skips the extract step
+    return hmac.new(prk, info + b"\x01", hashlib.sha256).digest()[:length]
+
+
+def _derive(password: str, salt: str, kdf_type: int, iterations: int, memory: int | None, parallelism: int | None) -> bytes:
+    if kdf_type == KDF_PBKDF2:
+        return hashlib.pbkdf2_hmac("sha256", password.encode(), salt.encode(), iterations)
+    if kdf_type == KDF_ARGON2ID:
+        try:
+            from cryptography.hazmat.primitives.kdf.argon2 import Argon2id
+        except ImportError:
+            sys.exit("[!] Argon2id exports require 'cryptography' 44 or newer (pip install -U cryptography)")
+        return Argon2id(
+            salt=hashlib.sha256(salt.encode()).digest(),
+            length=32,
+            iterations=iterations,
+            lanes=parallelism,
+            memory_cost=memory * 1024,  # MiB in the export, KiB for Argon2
+        ).derive(password.encode())
+    raise ValueError(f"unsupported kdfType {kdf_type}")
+
+
+class ExportEncryption:
+    """Key material and KDF parameters of one password‑protected export."""
+
+    def __init__(self, envelope: dict, key: bytes):
+        self.envelope = {name: envelope.get(name) for name in ENVELOPE_KEYS if name != "data"}
+        self.enc_key = _hkdf_expand(key, b"enc")
+        self.mac_key = _hkdf_expand(key, b"mac")
+
+    @classmethod
+    def unlock(cls, envelope: dict, password: str) -> "ExportEncryption":
+        """Derive the key of *envelope* from *password* (the only slow step) and check it.
+
+        Raises `WrongPassword` before the (large) data blob is touched.
+        """
+        key = _derive(
+            password,
+            envelope["salt"],
+            envelope["kdfType"],
+            envelope["kdfIterations"],
+            envelope.get("kdfMemory"),
+            envelope.get("kdfParallelism"),
+        )
+        encryption = cls(envelope, key)
+        encryption.decrypt(envelope[_VALIDATION_KEY])
+        return encryption
+
+    @classmethod
+    def create(
+        cls,
+        password: str,
+        iterations: int = DEFAULT_ITERATIONS,
+        kdf_type: int = KDF_PBKDF2,
+        memory: int | None = None,
+        parallelism: int | None = None,
+    ) -> "ExportEncryption":
+        """Fresh KDF parameters and key for *password*, e.g. to build fixture exports.
+
+        For Argon2id, *iterations*, *memory* (MiB) and *parallelism* default to
+        Bitwarden's 3, 64 and 4.
+        """
+        if kdf_type == KDF_ARGON2ID:
+            iterations = 3 if iterations == DEFAULT_ITERATIONS else iterations
+            memory, parallelism = memory or 64, parallelism or 4
+        salt = base64.b64encode(os.urandom(16)).decode()
+        envelope = {
+            "encrypted": True, "passwordProtected": True, "salt": salt, "kdfType": kdf_type,
+            "kdfIterations": iterations, "kdfMemory": memory, "kdfParallelism": parallelism,
+        }
+        encryption = cls(envelope, _derive(password, salt, kdf_type, iterations, memory, parallelism))
+        encryption.envelope[_VALIDATION_KEY] = encryption.encrypt(str(uuid.uuid4()).encode())
+        return encryption
+
+    def decrypt(self, enc_string: str) -> bytes:
+        enc_type, _, payload = enc_string.partition(".")
+        parts = payload.split("|")
+        if enc_type != _ENC_TYPE or len(parts) != 3:
+            raise ValueError(f"unsupported encryption type {enc_type!r}")
+        iv, ciphertext, mac = (base64.b64decode(part) for part in parts)
+        if not hmac.compare_digest(mac, hmac.new(self.mac_key, iv + ciphertext, hashlib.sha256).digest()):
+            raise WrongPassword("wrong password or corrupted export")
+        padding, Cipher, algorithms, modes = _cipher_module()
+        decryptor = Cipher(algorithms.AES(self.enc_key), modes.CBC(iv)).decryptor()
+        unpadder = padding.PKCS7(128).unpadder()
+        return unpadder.update(decryptor.update(ciphertext) + decryptor.finalize()) + unpadder.finalize()
+
+    def encrypt(self, plaintext: bytes) -> str:
+        padding, Cipher, algorithms, modes = _cipher_module()
+        iv = os.urandom(16)
+        padder = padding.PKCS7(128).padder()
+        encryptor = Cipher(algorithms.AES(self.enc_key), modes.CBC(iv)).encryptor()
+        ciphertext = encryptor.update(padder.update(plaintext) + padder.finalize()) + encryptor.finalize()
+        mac = hmac.new(self.mac_key, iv + ciphertext, hashlib.sha256).digest()
+        return f"{_ENC_TYPE}." + "|".join(base64.b64encode(part).decode() for part in (iv, ciphertext, mac))
+
+    def seal(self, plaintext: bytes) -> dict:
+        """The envelope for *plaintext* (a complete export), with a fresh IV and the same password."""
+        return {**self.envelope, "data": self.encrypt(plaintext)}
+
+
+def is_password_protected(envelope: dict) -> bool:
+    return bool(envelope.get("encrypted") and envelope.get("passwordProtected"))
@@ -0,0 +1,118 @@
+import json
+from typing import Any, Generator, TextIO
+
+_WHITESPACE = " \t\n\r"
+_DELIMITERS = _WHITESPACE + ",:]}"
+
+
+class JsonStreamReader:
+    """Incremental reader for one large JSON document.
+
+    The document is consumed from *fh* in chunks, so only the value that is
+    currently being decoded has to fit in memory. Containers are walked with
+    :meth:`iter_object` / :meth:`iter_array`; each value inside them is then
+    pulled with :meth:`read_value`, which returns the decoded object together
+    with its exact source text.
+    """
+
+    def __init__(self, fh: TextIO, chunk_size: int = 1 << 20):
+        self._fh = fh
+        self._chunk_size = chunk_size
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+        self._decoder = json.JSONDecoder()
+
+    # ------------------------------------------------------------------
+    # Buffer handling
+    # ------------------------------------------------------------------
+    def _fill(self) -> bool:
+        """Read another chunk into the buffer. Returns False at EOF."""
+        if self._eof:
+            return False
+        chunk = self._fh.read(self._chunk_size)
+        if not chunk:
+            self._eof = True
+            return False
+        # drop the consumed prefix so the buffer never grows with the file
+        self._buffer = self._buffer[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def _peek(self) -> str:
+        """Return the next non‑whitespace character without consuming it."""
+        while True:
+            buffer, pos = self._buffer, self._pos
+            while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+                pos += 1
+            self._pos = pos
+            if pos < len(buffer):
+                return buffer[pos]
+            if not self._fill():
+                raise ValueError("Unexpected end of JSON document")
+
+    def _expect(self, char: str) -> None:
+        found = self._peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r} but found {found!r} at offset {self._pos}")
+        self._pos += 1
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    def read_value(self) -> tuple[Any, str]:
+        """Decode the next JSON value and return ``(value, raw_text)``."""
+        self._peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            # A scalar cut at the chunk border (e.g. ``12`` of ``123.5``) decodes
+            # fine, so only trust the result once a delimiter follows it.
+            if (end == len(self._buffer) or self._buffer[end] not in _DELIMITERS) and self._fill():
+                continue
+            raw = self._buffer[self._pos:end]
+            self._pos = end
+            return value, raw
+
+    def iter_object(self) -> Generator[str, Any, None]:
+        """Yield the keys of the next JSON object.
+
+        After each key the caller must consume the associated value, e.g. via
+        :meth:`read_value` or a nested :meth:`iter_array`.
+        """
+        self._expect("{")
+        if self._peek() == "}":
+            self._pos += 1
+            return
+        while True:
+            key, _ = self.read_value()
+            if not isinstance(key, str):
+                raise ValueError(f"Expected object key at offset {self._pos}")
+            self._expect(":")
+            yield key
+            if self._peek() == ",":
+                self._pos += 1
+                continue
+            self._expect("}")
+            return
+
+    def iter_array(self) -> Generator[None, Any, None]:
+        """Yield once per element of the next JSON array.
+
+        The caller must consume the element before resuming the generator.
+        """
+        self._expect("[")
+        if self._peek() == "]":
+            self._pos += 1
+            return
+        while True:
+            yield None
+            if self._peek() == ",":
+                self._pos += 1
+                continue
+            self._expect("]")
+            return
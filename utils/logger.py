@@ -1,24 +1,53 @@
 import logging
+import re
+import sys
 
-from rich.logging import RichHandler, Console
-CONSOLE = Console(width=320)
+# rich markup tags such as "[bold cyan]" / "[/bold cyan]" in log format strings
+_MARKUP = re.compile(r"\[/?[a-z ]+\]")
+_CONSOLE = None
 
-def setup_logger() -> logging.Logger:
+
+def get_console():
+    """The shared rich console; rich is only imported on first use."""
+    global _CONSOLE
+    if _CONSOLE is None:
+        from rich.console import Console
+        _CONSOLE = Console(width=320)
+    return _CONSOLE
+
+
+class PlainFormatter(logging.Formatter):
+    """Formatter for non‑interactive runs that drops rich markup from messages."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        if isinstance(record.msg, str) and "[" in record.msg:
+            record = logging.makeLogRecord({**record.__dict__, "msg": _MARKUP.sub("", record.msg)})
+        return super().format(record)
+
+
+def setup_logger(interactive: bool | None = None) -> logging.Logger:
+    """Log through rich when attached to a terminal, plain text otherwise.
+
+    Importing rich costs more than a small run, so batch invocations (stderr
+    not a TTY) never load it.
+    """
+    if interactive is None:
+        interactive = sys.stderr.isatty()
     level = logging.INFO
-    logging.basicConfig(
-        level=level,
-        format="%(message)s",
-        datefmt="[%X]",
-        handlers=[
-            RichHandler(
-                rich_tracebacks=True,
-                markup=True,
-                show_path=False,
-                console=CONSOLE
-            )
-        ],
-    )
+    if interactive:
+        from rich.logging import RichHandler
+        handler = RichHandler(
+            rich_tracebacks=True,
+            markup=True,
+            show_path=False,
+            console=get_console()
+        )
+        handler.setFormatter(logging.Formatter("%(message)s", datefmt="[%X]"))
+    else:
+        handler = logging.StreamHandler()
+        handler.setFormatter(PlainFormatter("%(asctime)s %(levelname)-8s %(message)s", datefmt="[%X]"))
+    logging.basicConfig(level=level, handlers=[handler])
     return logging.getLogger("bw_cleanup")
 
 
-logger = setup_logger()
\ No newline at end of file
+logger = setup_logger()
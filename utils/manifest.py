@@ -0,0 +1,173 @@
+import hashlib
+import json
+import os
+import re
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Optional
+
+from data.bitwarden import BitwardenEntry
+from utils.logger import logger
+
+MANIFEST_VERSION = 3
+
+
+def _content_digest(entry: BitwardenEntry) -> str:
+    """Hash of *entry*'s (keyed) credential fingerprint and raw URIs."""
+    content = json.dumps([entry.get_fingerprint(), [u.uri for u in entry.login.uris]])
+    return hashlib.blake2b(content.encode(), digest_size=16).hexdigest()
+
+
+@dataclass
+class ManifestItem:
+    """What a previous run knew about one input item."""
+
+    revision_date: Optional[str]
+    digest: str  # see `_content_digest`
+    cluster: Optional[int] = None  # dedup cluster of the run that wrote it
+
+    def to_dict(self) -> dict:
+        return {
+            "revisionDate": self.revision_date,
+            "digest": self.digest,
+            "cluster": self.cluster,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ManifestItem":
+        return cls(
+            revision_date=data.get("revisionDate"),
+            digest=data["digest"],
+            cluster=data.get("cluster"),
+        )
+
+
+class Manifest:
+    """State carried between runs for incremental mode.
+
+    For every input item the manifest stores its `revisionDate`, dedup
+    cluster and a digest of its credentials and URIs; for every
+    shared‑credential group that was already decided it stores a signature of
+    its members. Neither URIs nor credentials are stored, and the digests
+    depend on the merge cache's fingerprint key. If a whole cluster of the
+    previous run is unchanged (same ids, revision dates and digests), its
+    members are joined without computing their keys (see
+    `deduplicate_items`). Groups whose signature is unchanged are not
+    prompted again unless *reopen* matches their username (cached merges are
+    still replayed so the output stays complete).
+    """
+
+    def __init__(self, path: Path, reopen: Optional[re.Pattern] = None):
+        self.path = path
+        self.reopen = reopen
+        self.previous_items: dict[str, ManifestItem] = {}
+        self.previous_groups: dict[str, str] = {}
+        self.items: dict[str, ManifestItem] = {}
+        self.groups: dict[str, str] = {}  # credential fingerprint -> member signature
+        # per loaded entry (by object id): its manifest item and, if reusable, its previous cluster
+        self._entry_items: dict[int, ManifestItem] = {}
+        self._clusters: dict[int, int] = {}
+        self.load()
+
+    def load(self) -> None:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return
+        except json.JSONDecodeError:
+            logger.warning("Manifest file is corrupted. Running a full pass.")
+            return
+        if data.get("version") != MANIFEST_VERSION:
+            logger.warning("Manifest was written by another version. Running a full pass.")
+            return
+        self.previous_items = {item_id: ManifestItem.from_dict(item) for item_id, item in data.get("items", {}).items()}
+        self.previous_groups = data.get("groups", {})
+
+    def save(self) -> None:
+        data = {
+            "version": MANIFEST_VERSION,
+            # nothing refreshed (e.g. the vault came from a parsed snapshot): keep the old items
+            "items": {item_id: item.to_dict() for item_id, item in (self.items or self.previous_items).items()},
+            "groups": self.groups,
+        }
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        tmp_path.write_text(json.dumps(data), encoding="utf-8")
+        os.replace(tmp_path, self.path)
+        logger.info(f"Saved incremental manifest to {self.path}")
+
+    # ------------------------------------------------------------------
+    # Items
+    # ------------------------------------------------------------------
+    def _unchanged(self, entry: BitwardenEntry, digest: str) -> Optional[ManifestItem]:
+        previous = self.previous_items.get(entry.id)
+        if previous is not None and previous.revision_date == entry.rawRevisionDate and previous.digest == digest:
+            return previous
+        return None
+
+    def refresh(self, entries: list[BitwardenEntry]) -> None:
+        """Record the freshly loaded *entries*, reusing unchanged items.
+
+        A previous cluster is only reused if all of its members are still
+        there and unchanged; items sharing an id with another entry are never
+        reused, since the manifest can only hold one of them.
+        """
+        shared_ids = {item_id for item_id, count in Counter(entry.id for entry in entries).items() if count > 1}
+        candidates: dict[int, int] = {}
+        unchanged = 0
+        for entry in entries:
+            digest = _content_digest(entry)
+            item = None if entry.id in shared_ids else self._unchanged(entry, digest)
+            if item is None:
+                item = ManifestItem(revision_date=entry.rawRevisionDate, digest=digest)
+            else:
+                unchanged += 1
+                if item.cluster is not None:
+                    candidates[id(entry)] = item.cluster
+            self.items[entry.id] = item
+            self._entry_items[id(entry)] = item
+
+        expected = Counter(item.cluster for item in self.previous_items.values() if item.cluster is not None)
+        present = Counter(candidates.values())
+        self._clusters = {key: cluster for key, cluster in candidates.items() if present[cluster] == expected[cluster]}
+        removed = len(self.previous_items.keys() - self.items.keys())
+        logger.info(
+            f"Incremental mode: {unchanged} unchanged, {len(entries) - unchanged} new or changed, {removed} removed items; "
+            f"{len(set(self._clusters.values()))} clusters reused"
+        )
+
+    def previous_cluster(self, entry: BitwardenEntry) -> Optional[int]:
+        """The previous run's dedup cluster of *entry*, if that whole cluster is unchanged."""
+        return self._clusters.get(id(entry))
+
+    def record_clusters(self, clusters: Iterable[tuple[BitwardenEntry, int]]) -> None:
+        """Remember the dedup cluster of every refreshed entry for the next run."""
+        for entry, cluster in clusters:
+            item = self._entry_items.get(id(entry))
+            if item is not None:
+                item.cluster = cluster
+
+    # ------------------------------------------------------------------
+    # Shared-credential groups
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _signature(group: list[BitwardenEntry]) -> str:
+        members = sorted(f"{item.id}\0{item.rawRevisionDate}" for item in group)
+        return hashlib.blake2b("\n".join(members).encode(), digest_size=16).hexdigest()
+
+    def is_reviewed(self, group: list[BitwardenEntry]) -> bool:
+        """True if *group* was decided in the previous run and none of its members changed.
+
+        Groups matching *reopen* are always decided again.
+        """
+        if self.reopen is not None and self.reopen.search(group[0].login.username or ""):
+            return False
+        fingerprint = group[0].get_fingerprint()
+        signature = self._signature(group)
+        if self.previous_groups.get(fingerprint) == signature:
+            self.groups[fingerprint] = signature
+            return True
+        return False
+
+    def mark_reviewed(self, group: list[BitwardenEntry]) -> None:
+        self.groups[group[0].get_fingerprint()] = self._signature(group)
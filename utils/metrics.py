@@ -0,0 +1,50 @@
+import json
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+
+from utils.logger import logger
+
+
+class Metrics:
+    """Lightweight run counters and per‑stage wall‑clock timers."""
+
+    def __init__(self):
+        self.counters: dict[str, int] = defaultdict(int)
+        self.timings: dict[str, float] = {}
+
+    def reset(self) -> None:
+        self.counters.clear()
+        self.timings.clear()
+
+    def incr(self, name: str, value: int = 1) -> None:
+        self.counters[name] += value
+
+    @contextmanager
+    def timer(self, stage: str):
+        """Time the enclosed block and add it to *stage*'s total."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[stage] = self.timings.get(stage, 0.0) + time.perf_counter() - start
+
+    def to_dict(self) -> dict:
+        return {
+            "timings": {stage: round(seconds, 6) for stage, seconds in self.timings.items()},
+            "counters": dict(self.counters),
+        }
+
+    def dump(self, path: Path) -> None:
+        path.write_text(json.dumps(self.to_dict(), indent=2), encoding="utf-8")
+        logger.info(f"Wrote run metrics to {path}")
+
+    def log_summary(self) -> None:
+        if self.timings:
+            logger.info("Stage timings: " + ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in self.timings.items()))
+        if self.counters:
+            logger.info("Counters: " + ", ".join(f"{name}={value}" for name, value in sorted(self.counters.items())))
+
+
+metrics = Metrics()
@@ -0,0 +1,149 @@
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable
+
+# Embedded subset of the Public Suffix List (https://publicsuffix.org/) in its
+# own rule syntax: the multi‑label suffixes that commonly show up in vaults.
+# Single‑label TLDs need no entry – the list's implicit "*" rule covers them.
+# A complete list can be loaded with `load_public_suffix_list`.
+EMBEDDED_RULES = """
+// ICANN
+ac.uk co.uk gov.uk ltd.uk me.uk net.uk nhs.uk org.uk plc.uk police.uk sch.uk
+asn.au com.au edu.au gov.au id.au net.au org.au
+ac.nz co.nz geek.nz gen.nz govt.nz kiwi.nz maori.nz net.nz org.nz school.nz
+ac.jp ad.jp co.jp ed.jp go.jp gr.jp lg.jp ne.jp or.jp
+ac.kr co.kr go.kr hs.kr mil.kr ne.kr or.kr pe.kr re.kr
+com.br edu.br gov.br net.br org.br
+ac.in co.in edu.in firm.in gen.in gov.in ind.in net.in org.in res.in
+ac.za co.za edu.za gov.za net.za org.za web.za
+ac.cn com.cn edu.cn gov.cn net.cn org.cn
+com.hk edu.hk gov.hk idv.hk net.hk org.hk
+com.tw edu.tw gov.tw idv.tw net.tw org.tw
+com.sg edu.sg gov.sg net.sg org.sg per.sg
+com.my edu.my gov.my net.my org.my
+com.mx edu.mx gob.mx net.mx org.mx
+com.ar edu.ar gob.ar int.ar net.ar org.ar
+biz.tr com.tr edu.tr gen.tr gov.tr info.tr net.tr org.tr
+ac.il co.il gov.il muni.il net.il org.il
+com.ua edu.ua gov.ua in.ua net.ua org.ua
+com.es edu.es gob.es nom.es org.es
+biz.pl com.pl edu.pl gov.pl info.pl net.pl org.pl
+com.ru net.ru org.ru pp.ru
+asso.fr com.fr gouv.fr nom.fr
+co.at or.at
+com.be
+com.pt edu.pt gov.pt org.pt
+com.co edu.co gov.co net.co org.co
+com.pe edu.pe gob.pe net.pe org.pe
+com.ph edu.ph gov.ph net.ph org.ph
+co.id go.id or.id web.id
+co.th go.th in.th or.th
+com.vn edu.vn gov.vn net.vn org.vn
+com.eg edu.eg gov.eg net.eg org.eg
+com.ng edu.ng gov.ng org.ng
+co.ke go.ke or.ke
+com.pk edu.pk gov.pk net.pk org.pk
+com.sa edu.sa gov.sa net.sa org.sa
+ac.ae co.ae gov.ae net.ae org.ae
+*.bd *.ck !www.ck *.er *.fk *.kh *.mm *.np
+// PRIVATE
+appspot.com azurewebsites.net blogspot.com cloudfront.net elasticbeanstalk.com
+firebaseapp.com fly.dev github.io gitlab.io herokuapp.com netlify.app
+onrender.com pages.dev s3.amazonaws.com vercel.app web.app workers.dev
+*.compute.amazonaws.com duckdns.org dyndns.org ngrok.io
+"""
+
+
+class _Node:
+    __slots__ = ("children", "terminal", "exception")
+
+    def __init__(self):
+        self.children: dict[str, "_Node"] = {}
+        self.terminal = False
+        self.exception = False
+
+
+class SuffixTrie:
+    """Public Suffix List rules compiled into a label trie (right to left)."""
+
+    def __init__(self, rules: Iterable[str] = ()):
+        self.root = _Node()
+        for rule in rules:
+            self.add(rule)
+
+    def add(self, rule: str) -> None:
+        exception = rule.startswith("!")
+        node = self.root
+        for label in reversed(rule.lstrip("!").lower().split(".")):
+            node = node.children.setdefault(label, _Node())
+        if exception:
+            node.exception = True
+        else:
+            node.terminal = True
+
+    def suffix_labels(self, labels: list[str]) -> int:
+        """Number of trailing *labels* that form the public suffix."""
+        node = self.root
+        best = 1  # implicit "*" rule
+        for depth, label in enumerate(reversed(labels), 1):
+            child = node.children.get(label)
+            if child is not None and child.exception:
+                return depth - 1
+            wildcard = node.children.get("*")
+            if wildcard is not None and wildcard.terminal:
+                best = max(best, depth)
+            if child is None:
+                break
+            if child.terminal:
+                best = max(best, depth)
+            node = child
+        return best
+
+
+def parse_rules(text: str) -> list[str]:
+    """Extract rules from Public Suffix List formatted *text*."""
+    rules = []
+    for line in text.splitlines():
+        line = line.split("//", 1)[0].strip()
+        rules.extend(line.split())
+    return rules
+
+
+_trie = SuffixTrie(parse_rules(EMBEDDED_RULES))
+
+
+def load_public_suffix_list(path: Path) -> None:
+    """Replace the embedded rules with a full ``public_suffix_list.dat``."""
+    global _trie
+    _trie = SuffixTrie(parse_rules(path.read_text(encoding="utf-8")))
+    registrable_domain.cache_clear()
+
+
+@lru_cache(maxsize=1 << 16)
+def registrable_domain(domain: str) -> str:
+    """Reduce a normalised domain to its registrable domain (eTLD+1).
+
+    ``login.example.com`` → ``example.com``, ``shop.example.co.uk`` →
+    ``example.co.uk``. IP addresses and hosts that are themselves public
+    suffixes are returned unchanged (without port or user info).
+    """
+    host = domain.rpartition("@")[2]
+    if host.startswith("["):  # IPv6 literal
+        return host
+    host = host.partition(":")[0].rstrip(".")
+    labels = host.split(".")
+    if all(label.isdigit() for label in labels):  # IPv4
+        return host
+    suffix = _trie.suffix_labels(labels)
+    if len(labels) <= suffix:
+        return host
+    return ".".join(labels[-suffix - 1:])
+
+
+def registrable_domains(domains: Iterable[str]) -> list[str]:
+    """`registrable_domain` for every entry of *domains*, without duplicates."""
+    seen: dict[str, None] = {}
+    for domain in domains:
+        seen.setdefault(registrable_domain(domain))
+    return list(seen)
+
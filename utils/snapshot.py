@@ -0,0 +1,123 @@
+import hashlib
+import marshal
+import os
+import sys
+from dataclasses import fields
+from pathlib import Path
+from typing import Optional
+
+from data.bitwarden import BitwardenEntry, LoginData, UriEntry
+from utils.logger import logger
+
+SNAPSHOT_VERSION = 2
+_MAGIC = b"BWSNAP%d" % SNAPSHOT_VERSION
+_SALT_SIZE = 16
+_NONCE_SIZE = 12
+
+# Packages whose code determines what a snapshot contains; all of their
+# sources are part of the snapshot key, so editing any of them invalidates old
+# snapshots.
+_PIPELINE_PACKAGES = ["data", "tools", "utils", "wrapper"]
+_ROOT = Path(__file__).resolve().parent.parent
+# dataclass fields packed positionally, in this order, next to the URIs / login
+_LOGIN_FIELDS = tuple(f.name for f in fields(LoginData) if f.init and f.name != "uris")
+_ENTRY_FIELDS = tuple(f.name for f in fields(BitwardenEntry) if f.init and f.name != "login")
+
+
+def _aesgcm(passphrase: str, salt: bytes):
+    try:
+        from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+    except ImportError:
+        sys.exit("[!] Parsed snapshots require the 'cryptography' package (pip install cryptography)")
+    key = hashlib.scrypt(passphrase.encode(), salt=salt, n=2 ** 15, r=8, p=1, maxmem=64 * 1024 * 1024, dklen=32)
+    return AESGCM(key)
+
+
+def _pack(entry: BitwardenEntry) -> tuple:
+    login = entry.login
+    return (
+        tuple((u.uri, u.match) for u in login.uris),
+        tuple(getattr(login, name) for name in _LOGIN_FIELDS),
+        tuple(getattr(entry, name) for name in _ENTRY_FIELDS),
+    )
+
+
+def _unpack(packed: tuple) -> BitwardenEntry:
+    uris, login_values, entry_values = packed
+    login = LoginData(uris=[UriEntry(uri, match) for uri, match in uris], **dict(zip(_LOGIN_FIELDS, login_values)))
+    return BitwardenEntry(login=login, **dict(zip(_ENTRY_FIELDS, entry_values)))
+
+
+def snapshot_key(*inputs: Optional[Path], options: str = "") -> str:
+    """Hash the contents of all *inputs*, the pipeline sources and *options*."""
+    h = hashlib.blake2b(digest_size=20)
+    h.update(_MAGIC)
+    for source in sorted(path for package in _PIPELINE_PACKAGES for path in (_ROOT / package).rglob("*.py")):
+        h.update(source.relative_to(_ROOT).as_posix().encode() + b"\0")
+        h.update(source.read_bytes())
+    for path in inputs:
+        h.update(b"\0file")
+        if path is None:
+            continue
+        with path.open("rb") as fh:
+            for chunk in iter(lambda: fh.read(1 << 20), b""):
+                h.update(chunk)
+    h.update(options.encode())
+    return h.hexdigest()
+
+
+class SnapshotStore:
+    """Encrypted on‑disk snapshots of parsed and deduplicated vault state.
+
+    A snapshot holds the entries plus the `BitwardenWrapper` passthrough state
+    (``metadata`` / ``other_items``). Entries are flattened to tuples and
+    serialised with `marshal`, which loads several times faster than pickling
+    the dataclasses. Snapshots contain plaintext credentials, so they are sealed
+    with AES‑GCM under a key derived (scrypt) from a user passphrase. The
+    snapshot key is used as associated data, so a file cannot be swapped for
+    another one; anything that fails to authenticate is treated as a miss.
+    """
+
+    def __init__(self, directory: Path, passphrase: str):
+        self.directory = directory
+        self.passphrase = passphrase
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.snapshot"
+
+    def load(self, key: str) -> Optional[dict]:
+        try:
+            blob = self._path(key).read_bytes()
+        except FileNotFoundError:
+            return None
+        if not blob.startswith(_MAGIC):
+            logger.warning("Ignoring snapshot in an unknown format")
+            return None
+        offset = len(_MAGIC)
+        salt = blob[offset:offset + _SALT_SIZE]
+        nonce = blob[offset + _SALT_SIZE:offset + _SALT_SIZE + _NONCE_SIZE]
+        aesgcm = _aesgcm(self.passphrase, salt)
+        from cryptography.exceptions import InvalidTag
+        try:
+            payload = aesgcm.decrypt(nonce, blob[offset + _SALT_SIZE + _NONCE_SIZE:], key.encode())
+        except InvalidTag:
+            logger.warning("Snapshot could not be decrypted (wrong key?). Parsing the export again.")
+            return None
+        logger.info(f"Loaded parsed snapshot {self._path(key).name}")
+        state = marshal.loads(payload)
+        state["entries"] = [_unpack(packed) for packed in state["entries"]]
+        return state
+
+    def save(self, key: str, state: dict) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        salt = os.urandom(_SALT_SIZE)
+        nonce = os.urandom(_NONCE_SIZE)
+        payload = marshal.dumps({**state, "entries": [_pack(entry) for entry in state["entries"]]})
+        sealed = _aesgcm(self.passphrase, salt).encrypt(nonce, payload, key.encode())
+        path = self._path(key)
+        tmp_path = path.with_name(path.name + ".tmp")
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(_MAGIC + salt + nonce + sealed)
+        os.replace(tmp_path, path)
+        logger.info(f"Saved parsed snapshot {path.name}")
@@ -1,5 +1,24 @@
+import re
+import sys
+from functools import lru_cache
 from urllib.parse import urlparse, urlunparse
 
+from utils.logger import logger
+
+# Upper bound for each memoization cache (distinct URIs remembered).
+URL_CACHE_SIZE = 1 << 16
+
+# Plain ``scheme://host/path?query#fragment`` strings made of printable ASCII,
+# without the characters that make `urlparse` take a special path (IPv6
+# brackets in the host, ``;params`` in the path). Such URIs are split with one
+# regex match instead of `urlparse`; anything else falls back to it.
+_PLAIN_URL = re.compile(
+    r"([A-Za-z][A-Za-z0-9+.\-]*)://"
+    r"([^/?#;\[\]\x00-\x20\x7f-\U0010ffff]+)"
+    r"(/[^?#;\x00-\x20\x7f-\U0010ffff]*)?"
+    r"(?:[?#][^\x00-\x20\x7f-\U0010ffff]*)?"
+)
+
 
 def _normalise_netloc(netloc: str) -> str:
     """Canonical *netloc* – lowercase, strip leading *www.* and default ports."""
@@ -12,22 +31,40 @@ def _normalise_netloc(netloc: str) -> str:
     return netloc.lower()
 
 
+@lru_cache(maxsize=URL_CACHE_SIZE)
 def normalise_domain(uri: str) -> str:
-    """Extract canonical domain from any URI (scheme ignored)."""
+    """Extract canonical domain from any URI (scheme ignored).
+
+    Results are memoized and interned, so every occurrence of a domain shares
+    one string object.
+    """
+    match = _PLAIN_URL.fullmatch(uri)
+    if match:
+        return sys.intern(_normalise_netloc(match.group(2)))
     try:
         p = urlparse(uri, "https")
     except ValueError:
-        return uri.lower().strip()
-    return _normalise_netloc(p.netloc or p.path.split("/")[0])
+        return sys.intern(uri.lower().strip())
+    return sys.intern(_normalise_netloc(p.netloc or p.path.split("/")[0]))
 
 
+@lru_cache(maxsize=URL_CACHE_SIZE)
 def shorten_uri(uri: str, max_len: int = 128) -> str:
     """Return a cleaned‑up URI with query params/fragments removed.
 
     * Always strips **query parameters** and **fragments**.
     * If the remaining URI still exceeds *max_len*, it collapses to just
       `scheme://domain` (no path).
+
+    Results are memoized; plain `scheme://host/path` URIs skip `urlparse`.
     """
+    match = _PLAIN_URL.fullmatch(uri)
+    netloc = _normalise_netloc(match.group(2)) if match else ""
+    if netloc:
+        base = f"{match.group(1).lower()}://{netloc}"
+        candidate = base + (match.group(3) or "")
+        return candidate if len(candidate) <= max_len else base
+
     p = urlparse(uri, "https")
     scheme = p.scheme
     netloc = _normalise_netloc(p.netloc or p.path.split("/")[0])
@@ -40,4 +77,13 @@ def shorten_uri(uri: str, max_len: int = 128) -> str:
     if len(candidate) > max_len:
         candidate = urlunparse((scheme, netloc, "", "", "", ""))
 
-    return candidate
\ No newline at end of file
+    return candidate
+
+
+def log_cache_stats() -> None:
+    """Log the hit rate of the URL memoization caches."""
+    for func in (normalise_domain, shorten_uri):
+        info = func.cache_info()
+        calls = info.hits + info.misses
+        rate = info.hits / calls if calls else 0.0
+        logger.info(f"URL cache {func.__name__}: {info.hits}/{calls} hits ({rate:.1%}), {info.currsize} entries")
@@ -1,38 +1,168 @@
+import io
 import json
 import sys
 from pathlib import Path
+from typing import BinaryIO, Callable
 
 from data.bitwarden import BitwardenEntry
+from data.columnar import LoginStore
+from utils.export_crypto import ENVELOPE_KEYS, ExportEncryption, WrongPassword, is_password_protected
+from utils.json_stream import JsonStreamReader
 from utils.logger import logger
+from utils.metrics import metrics
 
 
 class BitwardenWrapper:
-    original_data: dict = {} # save other data here (e.g. folders, attachments, etc.)
-    other_items: list[dict] = [] # save other items here (e.g. notes, cards, etc.)
+    def __init__(self):
+        # top-level export keys in file order, with their raw JSON value (None marks "items")
+        self.metadata: list[tuple[str, bytes | None]] = [] # save other data here (e.g. folders, collections, etc.)
+        self.other_items: list[bytes] = [] # save other items here as raw JSON (e.g. notes, cards, etc.)
+        self.encryption: ExportEncryption | None = None  # set when a password-protected export was loaded
 
-    def load(self, path: Path) -> list[BitwardenEntry]:
-        password_entries: list[BitwardenEntry] = []
+    def load(
+        self,
+        path: Path,
+        store: LoginStore | None = None,
+        password: Callable[[], str] | None = None,
+    ) -> list[BitwardenEntry]:
+        """Stream the export, keeping only login entries as objects.
+
+        The ``items`` array is walked one element at a time: login items become
+        `BitwardenEntry` objects, everything else (non‑login items, folders,
+        collections, …) is kept as its raw UTF‑8 JSON text. With a *store*,
+        login data goes into that columnar `LoginStore`.
+
+        Password‑protected exports are decrypted in memory with the password
+        returned by *password* (only called for such exports); `save` then
+        encrypts the output again with the same password.
+        """
+        self.encryption = None
         try:
-            data = json.loads(path.read_text(encoding="utf-8"))
+            with path.open(encoding="utf-8-sig", newline="") as fh:
+                password_entries = self._read_export(JsonStreamReader(fh), store)
+
+            envelope = {key: json.loads(raw) for key, raw in self.metadata if key in ENVELOPE_KEYS}
+            if envelope.get("encrypted"):
+                self._unlock(envelope, password)
+                with metrics.timer("decrypt"):
+                    plaintext = self.encryption.decrypt(envelope["data"]).decode("utf-8-sig")
+                password_entries = self._read_export(JsonStreamReader(io.StringIO(plaintext, newline="")), store)
+                logger.info(f"Decrypted password-protected export {path}")
+
+            metrics.incr("items_parsed", len(password_entries) + len(self.other_items))
+            logger.info(f"Loaded {len(password_entries)} login items and {len(self.other_items)} other items from {path}")
+            return password_entries
+        except WrongPassword:
+            sys.exit(f"[!] Wrong password for the encrypted export {path}")
+        except Exception as exc:
+            sys.exit(f"[!] Failed to read Bitwarden JSON export: {exc}")
+
+    def unlock(self, path: Path, password: Callable[[], str] | None) -> None:
+        """Only derive the key of the password‑protected export at *path*, so `save` can encrypt.
+
+        Used when the entries come from elsewhere (a snapshot) and the export
+        itself does not need to be decrypted.
+        """
+        try:
+            self._unlock(json.loads(path.read_text(encoding="utf-8-sig")), password)
+        except WrongPassword:
+            sys.exit(f"[!] Wrong password for the encrypted export {path}")
+        except Exception as exc:
+            sys.exit(f"[!] Failed to read Bitwarden JSON export: {exc}")
 
-            self.original_data = data
+    def _unlock(self, envelope: dict, password: Callable[[], str] | None) -> None:
+        if not is_password_protected(envelope):
+            raise ValueError("account-encrypted exports cannot be decrypted offline; export with a password instead")
+        if password is None:
+            raise ValueError("the export is password protected")
+        self.encryption = ExportEncryption.unlock(envelope, password())
 
-            for item in data.get("items", []):
+    def _read_export(self, reader: JsonStreamReader, store: LoginStore | None) -> list[BitwardenEntry]:
+        password_entries: list[BitwardenEntry] = []
+        self.metadata = []
+        self.other_items = []
+        for key in reader.iter_object():
+            if key != "items":
+                _, raw = reader.read_value()
+                self.metadata.append((key, raw.encode("utf-8")))
+                continue
+
+            self.metadata.append((key, None))
+            for _ in reader.iter_array():
+                item, raw = reader.read_value()
                 if item.get("type") == 1:
                     # Only process login items
-                    password_entries.append(BitwardenEntry.from_dict(item))
+                    password_entries.append(BitwardenEntry.from_dict(item, store))
                 else:
                     # Save other items for later processing
-                    self.other_items.append(item)
+                    self.other_items.append(raw.encode("utf-8"))
 
-            return password_entries
-        except Exception as exc:
-            sys.exit(f"[!] Failed to read Bitwarden JSON export: {exc}")
+        if not any(raw is None for _, raw in self.metadata):
+            self.metadata.append(("items", None))
+        return password_entries
+
+
+    def save(self, path: Path, entries: list[BitwardenEntry], compact: bool = False, encrypt: bool = True) -> None:
+        """Stream the cleaned export to *path*.
 
+        Login entries are serialised one at a time; non‑login items and the
+        remaining metadata are copied through verbatim from the loaded export.
+        With *compact* the output has no indentation (passthrough values are
+        minified as well). If the export was password protected, the output is
+        encrypted with the same password unless *encrypt* is false; the
+        plaintext then only exists in memory.
+        """
+        if self.encryption is not None and encrypt:
+            buffer = io.BytesIO()
+            self._write(buffer, entries, compact)
+            with metrics.timer("encrypt"):
+                envelope = self.encryption.seal(buffer.getvalue())
+            data = _dumps(envelope, compact).encode("utf-8")
+            path.write_bytes(data)
+            metrics.incr("bytes_written", len(data))
+            logger.info(f"Saved encrypted Bitwarden export to {path}")
+            return
 
-    def save(self, path: Path, entries: list[BitwardenEntry]) -> None:
-        entries_dicts = [entry.to_dict() for entry in entries]
-        self.original_data["items"] = entries_dicts + self.other_items
+        with path.open("wb") as fh:
+            self._write(fh, entries, compact)
+            metrics.incr("bytes_written", fh.tell())
 
-        path.write_text(json.dumps(self.original_data, indent=2, ensure_ascii=False), encoding="utf-8")
         logger.info(f"Saved cleaned Bitwarden export to {path}")
+
+    def _write(self, fh: BinaryIO, entries: list[BitwardenEntry], compact: bool) -> None:
+        newline, indent = ("", "") if compact else ("\n", "  ")
+        item_indent = newline + indent * 2
+        separator = ":" if compact else ": "
+
+        def passthrough(raw: bytes) -> bytes:
+            if compact:
+                return _dumps(json.loads(raw), compact).encode("utf-8")
+            return raw
+
+        fh.write(b"{")
+        for idx, (key, raw) in enumerate(self.metadata):
+            fh.write(f"{',' if idx else ''}{newline}{indent}{json.dumps(key)}{separator}".encode("utf-8"))
+            if raw is not None:
+                fh.write(passthrough(raw))
+                continue
+
+            fh.write(b"[")
+            first = True
+            for entry in entries:
+                body = _dumps(entry.to_dict(), compact).replace("\n", item_indent)
+                fh.write(f"{'' if first else ','}{item_indent}{body}".encode("utf-8"))
+                first = False
+            for raw_item in self.other_items:
+                fh.write(f"{'' if first else ','}{item_indent}".encode("utf-8"))
+                fh.write(passthrough(raw_item))
+                first = False
+            if not first:
+                fh.write(f"{newline}{indent}".encode("utf-8"))
+            fh.write(b"]")
+        fh.write(f"{newline}}}".encode("utf-8"))
+
+
+def _dumps(obj, compact: bool) -> str:
+    if compact:
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+    return json.dumps(obj, indent=2, ensure_ascii=False)
@@ -1,31 +1,125 @@
 import csv
 import uuid
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Generator, Any, Optional
 
 from data.bitwarden import BitwardenEntry, LoginData, UriEntry
 from utils.logger import logger
-from utils.url import shorten_uri
+from utils.metrics import metrics
+from utils.url import shorten_uri, normalise_domain
 
 
-def chrome_csv_to_items(csv_path: Path) -> list[BitwardenEntry]:
-    """Convert Chrome passwords CSV → Bitwarden‑style items list."""
-    items: list[BitwardenEntry] = []
-    with (csv_path.open(newline="", encoding="utf-8") as fh):
-        reader = csv.DictReader(fh)
+@dataclass(frozen=True)
+class CsvProfile:
+    """Column layout of a browser / password manager CSV export.
+
+    Each field lists candidate header names in order of preference; the first
+    one present in the header row is used for the whole file. *signature* are
+    the columns that must all be present for auto‑detection to pick it.
+    """
+
+    name: str
+    signature: frozenset[str]
+    url: tuple[str, ...]
+    username: tuple[str, ...]
+    password: tuple[str, ...]
+    title: tuple[str, ...] = ()
+
+
+# Checked in order during auto‑detection, so more specific layouts come first
+# and the catch‑all chrome profile stays last. Insert a `CsvProfile` before it
+# to support another exporter.
+CSV_PROFILES: list[CsvProfile] = [
+    CsvProfile(
+        name="firefox",
+        signature=frozenset({"url", "username", "password", "httpRealm", "guid"}),
+        url=("url",),
+        username=("username",),
+        password=("password",),
+    ),
+    CsvProfile(
+        name="safari",
+        signature=frozenset({"Title", "URL", "Username", "Password"}),
+        url=("URL",),
+        username=("Username",),
+        password=("Password",),
+        title=("Title",),
+    ),
+    CsvProfile(
+        name="chrome",
+        signature=frozenset(),  # fallback: any header
+        url=("url", "origin", "URL"),
+        username=("username", "accountName", "Username"),
+        password=("password", "Password"),
+        title=("name",),
+    ),
+]
+
+# Exporters whose CSV layout is identical to a profile above (Edge writes
+# Chrome's header), accepted by name for `--csv-profile`.
+CSV_PROFILE_ALIASES: dict[str, str] = {"edge": "chrome"}
+
+
+def detect_csv_profile(header: list[str]) -> CsvProfile:
+    """Pick the first profile whose signature columns are all in *header*."""
+    columns = set(header)
+    for profile in CSV_PROFILES:
+        if profile.signature <= columns:
+            return profile
+    raise ValueError(f"Unrecognised CSV header: {', '.join(header)}")
+
+
+def _resolve(header: list[str], candidates: tuple[str, ...]) -> Optional[int]:
+    for column in candidates:
+        if column in header:
+            return header.index(column)
+    return None
+
+
+def iter_csv_items(csv_path: Path, profile: Optional[str] = None) -> Generator[BitwardenEntry, Any, None]:
+    """Lazily convert a browser passwords CSV → Bitwarden‑style items.
+
+    The column mapping is resolved once from the header row, either for the
+    named *profile* or by auto‑detection, and rows are yielded one at a time,
+    so the file itself is never buffered (the entries are, by whoever keeps them).
+    """
+    count = 0
+    with csv_path.open(newline="", encoding="utf-8") as fh:
+        reader = csv.reader(fh)
+        header = next(reader, [])
+        if profile is None:
+            csv_profile = detect_csv_profile(header)
+        else:
+            name = CSV_PROFILE_ALIASES.get(profile, profile)
+            csv_profile = next((p for p in CSV_PROFILES if p.name == name), None)
+            if csv_profile is None:
+                raise ValueError(f"Unknown CSV profile: {profile}")
+
+        url_idx = _resolve(header, csv_profile.url)
+        username_idx = _resolve(header, csv_profile.username)
+        password_idx = _resolve(header, csv_profile.password)
+        title_idx = _resolve(header, csv_profile.title)
+        width = len(header)
+
         for row in reader:
-            url = row.get("url") or row.get("origin") or row.get("URL") or ""
-            username = row.get("username") or row.get("accountName") or row.get("Username") or ""
-            password = row.get("password") or row.get("Password") or ""
+            if len(row) < width:
+                row += [""] * (width - len(row))
+            url = row[url_idx] if url_idx is not None else ""
+            username = row[username_idx] if username_idx is not None else ""
+            password = row[password_idx] if password_idx is not None else ""
             if not (url or username or password):
                 continue  # Skip empty rows
+            title = row[title_idx] if title_idx is not None else None
             # create id based on the username and password and name of the entry
             # this is to ensure that the same entry is not created multiple times
             # if the same entry is already present in the vault
-            new_id = str(uuid.uuid5(uuid.NAMESPACE_OID, f"{username}{password}{row.get('name')}"))
-            item = BitwardenEntry(
+            new_id = str(uuid.uuid5(uuid.NAMESPACE_OID, f"{username}{password}{title}"))
+            count += 1
+            yield BitwardenEntry(
                 id=new_id,
                 type=1,
-                name=row.get("name"),
+                name=title if title_idx is not None else normalise_domain(url),
                 favorite=False,
                 login=LoginData(
                     username=username,
@@ -35,7 +129,11 @@ def chrome_csv_to_items(csv_path: Path) -> list[BitwardenEntry]:
                     )],
                 ),
             )
-            items.append(item)
 
-    logger.info(f"Imported {len(items)} from Google Chrome passwords file")
-    return items
\ No newline at end of file
+    metrics.incr("csv_rows_imported", count)
+    logger.info(f"Imported {count} items from {csv_profile.name} passwords file")
+
+
+def chrome_csv_to_items(csv_path: Path) -> list[BitwardenEntry]:
+    """Convert Chrome passwords CSV → Bitwarden‑style items list."""
+    return list(iter_csv_items(csv_path))